@@ -0,0 +1,297 @@
+# Scripts/ciphertext_codec.py
+
+import hashlib
+import logging
+import struct
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from Pyfhel import Pyfhel, PyCtxt
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COMPACT_MAGIC = b"HEC1"
+CONTEXT_ID_SIZE = 8
+DIGEST_SIZE = 4
+COMPACT_HEADER_SIZE = len(COMPACT_MAGIC) + CONTEXT_ID_SIZE + DIGEST_SIZE
+
+# Layout of an uncompressed SEAL Ciphertext stream: a 16-byte SEALHeader whose 6th byte is the
+# compression mode, the 32-byte parms_id, the NTT-form flag, then size, poly_modulus_degree and
+# coeff_modulus_size as little-endian uint64. The coefficients (size x coeff_modulus_size x
+# poly_modulus_degree uint64) close the stream, preceded by their uint64 element count.
+_SEAL_MAGIC = b"\x5e\xa1"
+_COMPR_MODE_OFFSET = 5
+_GEOMETRY_OFFSET = 16 + 32 + 1
+_GEOMETRY = struct.Struct("<QQQ")
+_COUNT = struct.Struct("<Q")
+
+_TEMPLATES = {}
+
+
+@dataclass(frozen=True)
+class CiphertextTemplate:
+    """
+    Everything in a serialized ciphertext except its coefficients, shared by all ciphertexts
+    of the same context, level and scale, plus the byte width each RNS limb is packed to.
+    """
+    prefix: bytes
+    widths: tuple
+    size: int
+    degree: int
+    n_moduli: int
+
+    @property
+    def digest(self) -> bytes:
+        return hashlib.blake2b(self.prefix + bytes(self.widths), digest_size=DIGEST_SIZE).digest()
+
+
+def context_id(he: Pyfhel) -> bytes:
+    """
+    Returns the short identifier of an encryption context.
+    """
+    return hashlib.blake2b(he.to_bytes_context(), digest_size=CONTEXT_ID_SIZE).digest()
+
+
+def is_compact(value) -> bool:
+    return value is not None and value[:len(COMPACT_MAGIC)] == COMPACT_MAGIC
+
+
+def _width_for(max_coefficient: int) -> int:
+    for width in (2, 4, 8):
+        if max_coefficient < 1 << (8 * width):
+            return width
+    return 8
+
+
+def compact_bytes(seal_bytes: bytes, ctx_id: bytes) -> bytes:
+    """
+    Converts an uncompressed SEAL ciphertext stream into the compact format.
+
+    The header is replaced by the context id and a template digest, and every RNS limb is
+    stored with the narrowest of 2, 4 or 8 bytes per coefficient that fits it. The template is
+    registered so the ciphertext can be expanded again in this process.
+
+    Parameters:
+        seal_bytes (bytes): Ciphertext serialized with compr_mode='none'.
+        ctx_id (bytes): Identifier of the context the ciphertext belongs to.
+
+    Returns:
+        bytes: The compact ciphertext.
+
+    Raises:
+        ValueError: If the stream is compressed or does not have the expected layout.
+    """
+    if seal_bytes[:2] != _SEAL_MAGIC or seal_bytes[_COMPR_MODE_OFFSET] != 0:
+        raise ValueError("Expected an uncompressed SEAL ciphertext stream.")
+    size, degree, n_moduli = _GEOMETRY.unpack_from(seal_bytes, _GEOMETRY_OFFSET)
+    n_coefficients = size * degree * n_moduli
+    prefix_size = len(seal_bytes) - 8 * n_coefficients
+    if prefix_size < _GEOMETRY_OFFSET + _GEOMETRY.size + _COUNT.size or \
+            _COUNT.unpack_from(seal_bytes, prefix_size - _COUNT.size)[0] != n_coefficients:
+        raise ValueError("Unrecognized SEAL ciphertext layout.")
+
+    coefficients = np.frombuffer(seal_bytes, dtype='<u8', offset=prefix_size).reshape(size, n_moduli, degree)
+    limb_max = coefficients.max(axis=(0, 2))
+    widths = tuple(_width_for(int(value)) for value in limb_max)
+    template = CiphertextTemplate(seal_bytes[:prefix_size], widths, size, degree, n_moduli)
+    _TEMPLATES.setdefault((ctx_id, template.digest), template)
+
+    packed = [coefficients[:, limb, :].astype(f'<u{width}').tobytes() for limb, width in enumerate(widths)]
+    return b"".join([COMPACT_MAGIC, ctx_id, template.digest] + packed)
+
+
+def expand_bytes(compact: bytes) -> bytes:
+    """
+    Rebuilds the uncompressed SEAL stream of a compact ciphertext from its registered template.
+
+    Raises:
+        ValueError: If the value is not compact or its template has not been registered.
+    """
+    if not is_compact(compact):
+        raise ValueError("Value is not a compact ciphertext.")
+    ctx_id = compact[len(COMPACT_MAGIC):len(COMPACT_MAGIC) + CONTEXT_ID_SIZE]
+    digest = compact[len(COMPACT_MAGIC) + CONTEXT_ID_SIZE:COMPACT_HEADER_SIZE]
+    template = _TEMPLATES.get((ctx_id, digest))
+    if template is None:
+        raise ValueError(f"Unknown ciphertext template {digest.hex()} for context {ctx_id.hex()}; "
+                         "load the templates of the database first.")
+
+    prefix_size = len(template.prefix)
+    stream = np.empty(prefix_size + 8 * template.size * template.n_moduli * template.degree, dtype=np.uint8)
+    stream[:prefix_size] = np.frombuffer(template.prefix, dtype=np.uint8)
+    coefficients = stream[prefix_size:].view('<u8').reshape(template.size, template.n_moduli, template.degree)
+    offset = COMPACT_HEADER_SIZE
+    count = template.size * template.degree
+    for limb, width in enumerate(template.widths):
+        coefficients[:, limb, :] = np.frombuffer(compact, dtype=f'<u{width}', count=count, offset=offset) \
+            .reshape(template.size, template.degree)
+        offset += count * width
+    if offset != len(compact):
+        raise ValueError("Compact ciphertext length does not match its template.")
+    return stream.tobytes()
+
+
+def load_ciphertext(he: Pyfhel, value: bytes, ctxt: PyCtxt = None) -> PyCtxt:
+    """
+    Deserializes a ciphertext in either the compact or the regular Pyfhel format.
+
+    Pyfhel only fills a ciphertext from a complete SEAL stream, so compact values are first
+    expanded (one widening pass into a single buffer) and SEAL still parses and validates the
+    result. The compact format therefore saves storage and I/O, not deserialization work; see
+    benchmark_load for the per-ciphertext cost of each format.
+
+    Parameters:
+        he (Pyfhel): Pyfhel instance the ciphertext belongs to.
+        value (bytes): The serialized ciphertext.
+        ctxt (PyCtxt, optional): Preallocated ciphertext to fill instead of creating one.
+
+    Returns:
+        PyCtxt: The filled ciphertext.
+    """
+    if ctxt is None:
+        ctxt = PyCtxt(pyfhel=he)
+    ctxt.from_bytes(expand_bytes(value) if is_compact(value) else value)
+    return ctxt
+
+
+class CiphertextCodec:
+    """
+    Encodes ciphertexts of one encryption context into the compact storage format.
+    """
+
+    def __init__(self, he: Pyfhel):
+        self.he = he
+        self.context_id = context_id(he)
+        self._scratch = PyCtxt(pyfhel=he)
+        logger.info(f"Compact ciphertext codec ready for context {self.context_id.hex()}.")
+
+    def encode(self, ctxt) -> bytes:
+        """
+        Returns the compact form of a PyCtxt or of a ciphertext serialized by Pyfhel.
+        """
+        if isinstance(ctxt, (bytes, bytearray, memoryview)):
+            if is_compact(ctxt):
+                return bytes(ctxt)
+            ctxt = load_ciphertext(self.he, bytes(ctxt), self._scratch)
+        return compact_bytes(ctxt.to_bytes(compr_mode="none"), self.context_id)
+
+    def decode(self, value: bytes) -> bytes:
+        """
+        Returns the regular Pyfhel serialization of a compact ciphertext.
+        """
+        return expand_bytes(value) if is_compact(value) else value
+
+
+def benchmark_load(he: Pyfhel, n_ciphertexts: int = 100) -> dict:
+    """
+    Compares the size and load time of the regular (zstd), uncompressed and compact formats.
+
+    Returns:
+        dict: Bytes per ciphertext and milliseconds per load for each format.
+    """
+    codec = CiphertextCodec(he)
+    ctxt = he.encryptPtxt(he.encodeFrac(np.array([1.0], dtype=np.float64)))
+    formats = {
+        'regular': ctxt.to_bytes(compr_mode="zstd"),
+        'uncompressed': ctxt.to_bytes(compr_mode="none"),
+        'compact': codec.encode(ctxt),
+    }
+    target = PyCtxt(pyfhel=he)
+    results = {}
+    for name, value in formats.items():
+        start_time = time.perf_counter()
+        for _ in range(n_ciphertexts):
+            load_ciphertext(he, value, target)
+        results[name] = {
+            'bytes': len(value),
+            'load_ms': (time.perf_counter() - start_time) / n_ciphertexts * 1e3,
+        }
+    logger.info(f"Ciphertext load benchmark: {results}")
+    return results
+
+
+def save_templates(conn):
+    """
+    Persists the registered templates to the he_ciphertext_templates table.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS he_ciphertext_templates (
+            context_id BLOB,
+            digest BLOB,
+            prefix BLOB,
+            widths TEXT,
+            size INTEGER,
+            degree INTEGER,
+            n_moduli INTEGER,
+            PRIMARY KEY (context_id, digest)
+        )
+    """)
+    conn.executemany(
+        "INSERT OR IGNORE INTO he_ciphertext_templates VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(ctx_id, digest, t.prefix, ','.join(map(str, t.widths)), t.size, t.degree, t.n_moduli)
+         for (ctx_id, digest), t in _TEMPLATES.items()],
+    )
+    conn.commit()
+    logger.info(f"Saved {len(_TEMPLATES)} ciphertext templates.")
+
+
+def load_templates(conn) -> int:
+    """
+    Registers the templates stored in a database, returning how many were found.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'he_ciphertext_templates'"
+    ).fetchone()
+    if not exists:
+        return 0
+    rows = conn.execute(
+        "SELECT context_id, digest, prefix, widths, size, degree, n_moduli FROM he_ciphertext_templates"
+    ).fetchall()
+    for ctx_id, digest, prefix, widths, size, degree, n_moduli in rows:
+        template = CiphertextTemplate(bytes(prefix), tuple(int(w) for w in widths.split(',')), size, degree, n_moduli)
+        if template.digest != bytes(digest):
+            logger.warning(f"Skipping corrupt ciphertext template {bytes(digest).hex()}.")
+            continue
+        _TEMPLATES[(bytes(ctx_id), template.digest)] = template
+    logger.info(f"Loaded {len(rows)} ciphertext templates.")
+    return len(rows)
+
+
+def convert_table(conn, codec: CiphertextCodec, table: str, columns, batch_size: int = 500) -> dict:
+    """
+    Rewrites existing ciphertext columns of a table in the compact format.
+
+    Rows are converted in batches, committing after each, and the templates are saved so the
+    converted table can be read by other processes.
+
+    Returns:
+        dict: Number of converted values and total bytes before and after.
+    """
+    for name in [table, *columns]:
+        if not name.isidentifier():
+            raise ValueError(f"Invalid SQL identifier: {name!r}")
+
+    stats = {'converted': 0, 'bytes_before': 0, 'bytes_after': 0}
+    for column in columns:
+        rowids = [row[0] for row in conn.execute(f"SELECT rowid FROM {table} WHERE {column} IS NOT NULL")]
+        for start in range(0, len(rowids), batch_size):
+            updates = []
+            for rowid in rowids[start:start + batch_size]:
+                value = conn.execute(f"SELECT {column} FROM {table} WHERE rowid = ?", (rowid,)).fetchone()[0]
+                if is_compact(value):
+                    continue
+                compact = codec.encode(value)
+                stats['bytes_before'] += len(value)
+                stats['bytes_after'] += len(compact)
+                updates.append((compact, rowid))
+            conn.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", updates)
+            conn.commit()
+            stats['converted'] += len(updates)
+        logger.info(f"Converted column '{table}.{column}' to compact ciphertexts.")
+
+    save_templates(conn)
+    logger.info(f"Compact conversion of '{table}' finished: {stats}")
+    return stats
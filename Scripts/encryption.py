@@ -4,7 +4,9 @@ import sys
 from typing import Union
 
 import numpy as np
-from Pyfhel import Pyfhel, PyCtxt
+from Pyfhel import Pyfhel
+
+from Scripts.ciphertext_codec import CiphertextCodec, load_ciphertext, save_templates
 
 
 logging.basicConfig(
@@ -26,6 +28,7 @@ class HE:
 
     def __init__(self) -> None:
         self.he = Pyfhel()
+        self.codec = None
         logger.info("Pyfhel instance created.")
 
     def load_context(self, context_path: str) -> None:
@@ -70,6 +73,24 @@ class HE:
             logger.error(f"Failed to load secret key from '{secret_key_path}': {e}")
             sys.exit(1)
 
+    def enable_compact_serialization(self, conn) -> None:
+        """
+        Makes encrypt_value emit the compact, context-referenced ciphertext format.
+
+        Compact ciphertexts can only be read where their template is registered, so a probe
+        value is encrypted to register the template of fresh ciphertexts and it is saved to
+        the database the ciphertexts will be written to. Must be called after the context has
+        been loaded.
+
+        Args:
+            conn (sqlite3.Connection): Connection to the database receiving the ciphertexts.
+        """
+        codec = CiphertextCodec(self.he)
+        codec.encode(self.he.encryptPtxt(self.he.encodeFrac(np.array([0.0], dtype=np.float64))))
+        save_templates(conn)
+        self.codec = codec
+        logger.info("Compact ciphertext serialization enabled.")
+
     def encrypt_value(self, value: Union[float, int, str]) -> bytes:
         """
         Encrypts a numerical or string value and returns the ciphertext as bytes.
@@ -91,7 +112,10 @@ class HE:
             else:
                 raise ValueError(f"Unsupported data type for encryption: {type(value)}")
 
-            ciphertext_bytes = ctxt.to_bytes()
+            if self.codec is not None and isinstance(value, (int, float)):
+                ciphertext_bytes = self.codec.encode(ctxt)
+            else:
+                ciphertext_bytes = ctxt.to_bytes()
             logger.debug(f"Encrypted value '{value}' to ciphertext bytes.")
             return ciphertext_bytes
         except Exception as e:
@@ -109,7 +133,7 @@ class HE:
             Union[float, str, None]: The decrypted value or None if decryption fails.
         """
         try:
-            ctxt = PyCtxt(pyfhel=self.he, bytestring=ciphertext_bytes)
+            ctxt = load_ciphertext(self.he, ciphertext_bytes)
             scheme = self.he.get_ciphertext_scheme()
             if scheme == 'CKKS':
                 decrypted = self.he.decryptFrac(ctxt)
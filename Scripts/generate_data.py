@@ -1,9 +1,20 @@
-from encryption import HE  
 import sqlite3
 import logging
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+if __package__ in (None, ''):
+    # Run as a script (python Scripts/generate_data.py): make the Scripts package importable.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Scripts.encryption import HE
+from Scripts.housing_schema import COLUMNS, INSERT_SQL, SAMPLE_DATA, encrypt_rows
+from Scripts.sampling import build_sample_table
+from Scripts.synthetic_data import CaliforniaHousingGenerator, load_california_housing
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,7 +26,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def create_encrypted_db_with_dummy_data():
+def load_he_instance():
     he_instance = HE()
     current_dir = Path(__file__).parent
     context_path = current_dir / "context.ckks"
@@ -25,9 +36,9 @@ def create_encrypted_db_with_dummy_data():
     he_instance.load_context(str(context_path))
     he_instance.load_public_key(str(public_key_path))
     he_instance.load_secret_key(str(secret_key_path))  # Ensure this file exists
+    return he_instance
 
-    
-    db_path = 'california_housing.db'
+def connect_and_create_table(db_path):
     try:
         conn = sqlite3.connect(db_path)
         logger.info(f"Connected to SQLite database '{db_path}'.")
@@ -59,34 +70,17 @@ def create_encrypted_db_with_dummy_data():
     except sqlite3.Error as e:
         logger.error(f"Failed to create 'housing_encrypted' table: {e}")
         sys.exit(1)
+    return conn
 
-    # Sample data to insert
-    sample_data = [
-        (8.3252, 41, 880, 6.9841, 1.0238, -122.23, 37.88, 452600, 2.555),
-        (8.3014, 21, 1262, 6.2381, 0.9719, -122.22, 37.86, 358500, 2.109),
-        
-    ]
+def create_encrypted_db_with_dummy_data(sample_fraction=None, sample_method='bernoulli'):
+    he_instance = load_he_instance()
+    db_path = 'california_housing.db'
+    conn = connect_and_create_table(db_path)
+    cursor = conn.cursor()
 
-    
-    for idx, row in enumerate(sample_data, start=1):
-        encrypted_row = []
-        for value in row:
-            encrypted_bytes = he_instance.encrypt_value(value)
-            encrypted_row.append(encrypted_bytes)
+    for idx, encrypted_row in enumerate(encrypt_rows(he_instance, SAMPLE_DATA), start=1):
         try:
-            cursor.execute("""
-                INSERT INTO housing_encrypted (
-                    MedInc_enc,
-                    HouseAge_enc,
-                    Population_enc,
-                    AveRooms_enc,
-                    AveOccup_enc,
-                    Longitude_enc,
-                    Latitude_enc,
-                    MedHouseVal_enc,
-                    AveBedrms_enc
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
-            """, encrypted_row)
+            cursor.execute(INSERT_SQL, encrypted_row)
             logger.info(f"Inserted encrypted row {idx} into 'housing_encrypted' table.")
         except sqlite3.Error as e:
             logger.error(f"Failed to insert encrypted row {idx}: {e}")
@@ -94,8 +88,81 @@ def create_encrypted_db_with_dummy_data():
 
     conn.commit()
     logger.info("All sample data encrypted and inserted successfully.")
+
+    if sample_fraction is not None:
+        build_sample_table(conn, 'housing_encrypted', fraction=sample_fraction, method=sample_method)
+    conn.close()
+    logger.info(f"Database connection to '{db_path}' closed.")
+
+def populate_encrypted_db(db_path='california_housing.db', n_rows=100000, chunk_size=1000, seed=None,
+                          data_path=None, workers=1, max_in_flight=None, sample_fraction=None,
+                          sample_method='bernoulli', he_instance=None):
+    """
+    Fills housing_encrypted with synthetic or real California housing rows at scale.
+
+    Plaintext chunks are produced lazily (generated with a fixed seed, or streamed from
+    ``data_path``), encrypted on ``workers`` background threads and inserted on the calling
+    thread in generation order. At most ``max_in_flight`` chunks are pending at once, which
+    bounds memory independently of ``n_rows``. Encryption overlaps with generation and with
+    SQLite's inserts only as far as they release the GIL; sqlite3 does so while executing,
+    Pyfhel's encryption calls do not, so extra workers do not parallelize encryption.
+
+    Args:
+        db_path (str): SQLite database to (re)create the table in.
+        n_rows (int): Rows to generate, or the maximum to load from ``data_path``.
+        chunk_size (int): Rows encrypted and inserted per transaction.
+        seed (int, optional): Seed for reproducible synthetic data.
+        data_path (str, optional): Local CSV or cal_housing.data file with the real dataset.
+        workers (int): Encryption threads sharing the HE instance.
+        max_in_flight (int, optional): Pending chunks; defaults to twice the workers.
+        sample_fraction (float, optional): Also materialize a sample table of this fraction.
+        sample_method (str): 'bernoulli' or 'stratified' sampling.
+        he_instance (HE, optional): Encryptor to use instead of the keys in this directory.
+
+    Returns:
+        dict: Number of inserted rows, elapsed seconds and rows per second.
+    """
+    if he_instance is None:
+        he_instance = load_he_instance()
+    conn = connect_and_create_table(db_path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+
+    if data_path is not None:
+        chunks = load_california_housing(data_path, chunk_size=chunk_size, n_rows=n_rows)
+    else:
+        chunks = CaliforniaHousingGenerator(seed).iter_chunks(n_rows, chunk_size)
+    max_in_flight = max_in_flight or 2 * workers
+
+    inserted = 0
+    start_time = time.perf_counter()
+
+    def insert(future):
+        nonlocal inserted
+        encrypted_rows = future.result()
+        conn.executemany(INSERT_SQL, encrypted_rows)
+        conn.commit()
+        inserted += len(encrypted_rows)
+        logger.info(f"Inserted {inserted} encrypted rows into 'housing_encrypted'.")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(encrypt_rows, he_instance, chunk.tolist()))
+            if len(pending) >= max_in_flight:
+                insert(pending.popleft())
+        while pending:
+            insert(pending.popleft())
+
+    elapsed = time.perf_counter() - start_time
+    stats = {'rows': inserted, 'seconds': elapsed, 'rows_per_sec': inserted / elapsed if elapsed else 0.0}
+    logger.info(f"Populated '{db_path}': {stats}")
+
+    if sample_fraction is not None:
+        build_sample_table(conn, 'housing_encrypted', fraction=sample_fraction, method=sample_method, seed=seed)
     conn.close()
     logger.info(f"Database connection to '{db_path}' closed.")
+    return stats
 
 if __name__ == "__main__":
     create_encrypted_db_with_dummy_data()
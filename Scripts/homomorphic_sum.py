@@ -1,11 +1,18 @@
 # Scripts/homomorphic_sum.py
 
 import os
+import time
+import tracemalloc
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 from Pyfhel import Pyfhel, PyCtxt
 import numpy as np
 import logging
 
+from Scripts.ciphertext_codec import load_ciphertext
+from Scripts.sampling import pack_bundle
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -59,12 +66,13 @@ def homomorphic_sum_py(he: Pyfhel, *ciphertexts: bytes) -> bytes:
         raise ValueError("At least one ciphertext is required for summation.")
 
     # Initialize the total ciphertext with the first ciphertext
-    total_ctxt = PyCtxt(pyfhel=he, bytestring=ciphertexts[0])
+    total_ctxt = load_ciphertext(he, ciphertexts[0])
     logger.debug("Initialized total_ctxt with the first ciphertext.")
 
     # Add the remaining ciphertexts
+    ctxt = PyCtxt(pyfhel=he)
     for ct in ciphertexts[1:]:
-        ctxt = PyCtxt(pyfhel=he, bytestring=ct)
+        load_ciphertext(he, ct, ctxt)
         total_ctxt += ctxt  # Homomorphic addition
         logger.debug("Added a ciphertext to total_ctxt.")
 
@@ -88,6 +96,7 @@ class HomomorphicSumAggregate:
         try:
             self.he = initialize_pyfhel(str(context_path), str(public_key_path))
             self.total_ctxt = None
+            self.scratch_ctxt = PyCtxt(pyfhel=self.he)
             logger.info("HomomorphicSumAggregate initialized with context and public key.")
         except FileNotFoundError as e:
             logger.error(f"Initialization failed: {e}")
@@ -104,11 +113,10 @@ class HomomorphicSumAggregate:
             logger.warning("HomomorphicSumAggregate: Received None value.")
             return
         if self.total_ctxt is None:
-            self.total_ctxt = PyCtxt(pyfhel=self.he, bytestring=value)
+            self.total_ctxt = load_ciphertext(self.he, value)
             logger.debug("HomomorphicSumAggregate: Initialized total_ctxt with first ciphertext.")
         else:
-            ctxt = PyCtxt(pyfhel=self.he, bytestring=value)
-            self.total_ctxt += ctxt
+            self.total_ctxt += load_ciphertext(self.he, value, self.scratch_ctxt)
             logger.debug("HomomorphicSumAggregate: Added ciphertext to total_ctxt.")
 
     def finalize(self):
@@ -125,3 +133,363 @@ class HomomorphicSumAggregate:
         logger.info("HomomorphicSumAggregate: Finalizing aggregated ciphertext.")
         return aggregated_ctxt_bytes
 
+
+def homomorphic_sum_streaming(conn, he: Pyfhel, table: str, column: str,
+                              where: str = None, params=()) -> bytes:
+    """
+    Sums the ciphertexts of a column by streaming them through SQLite incremental BLOB I/O.
+
+    Instead of going through the aggregate callback, the rowids of the matching rows are
+    iterated and each ciphertext is read with ``Connection.blobopen`` (Python 3.11+) into a
+    single reusable PyCtxt, which is then added in place to the running total.
+
+    sqlite3.Blob has no readinto and PyCtxt.from_bytes only accepts bytes, so every row
+    still allocates one bytes object, exactly like HomomorphicSumAggregate.step; both paths
+    keep peak memory flat at about one ciphertext. What blobopen saves is the aggregate
+    callback around each value, at the cost of a rowid lookup per row. Use
+    benchmark_streaming to compare both paths on a real table.
+
+    Parameters:
+        conn (sqlite3.Connection): Open connection to the database.
+        he (Pyfhel): An initialized Pyfhel object with loaded context and public key.
+        table (str): Name of the table holding the ciphertexts.
+        column (str): Name of the BLOB column to sum.
+        where (str, optional): SQL filter applied to the scan, without the WHERE keyword.
+        params (sequence, optional): Parameters bound to the filter.
+
+    Returns:
+        bytes: The aggregated ciphertext as bytes, or None if no rows matched.
+    """
+    for name in (table, column):
+        if not name.isidentifier():
+            raise ValueError(f"Invalid SQL identifier: {name!r}")
+
+    filter_sql = f" WHERE {where}" if where else ""
+    total_ctxt = None
+    scratch_ctxt = PyCtxt(pyfhel=he)
+
+    if not hasattr(conn, "blobopen"):
+        # Python < 3.11 has no incremental BLOB I/O; fall back to a streamed cursor.
+        logger.warning("Connection.blobopen is unavailable; streaming ciphertexts through a cursor.")
+        rows = conn.execute(f"SELECT {column} FROM {table}{filter_sql}", params)
+        for (value,) in rows:
+            if value is None:
+                continue
+            if total_ctxt is None:
+                total_ctxt = load_ciphertext(he, value)
+            else:
+                total_ctxt += load_ciphertext(he, value, scratch_ctxt)
+    else:
+        rowids = conn.execute(
+            f"SELECT rowid FROM {table} WHERE {column} IS NOT NULL"
+            + (f" AND ({where})" if where else ""),
+            params,
+        )
+        for (rowid,) in rowids:
+            with conn.blobopen(table, column, rowid, readonly=True) as blob:
+                if total_ctxt is None:
+                    total_ctxt = load_ciphertext(he, blob.read())
+                else:
+                    total_ctxt += load_ciphertext(he, blob.read(), scratch_ctxt)  # In-place homomorphic addition
+            logger.debug(f"Streamed ciphertext from rowid {rowid} into total_ctxt.")
+
+    if total_ctxt is None:
+        logger.warning("homomorphic_sum_streaming: No ciphertexts were aggregated.")
+        return None
+    logger.info(f"Streaming homomorphic summation over '{table}.{column}' completed.")
+    return total_ctxt.to_bytes()
+
+def benchmark_streaming(conn, he: Pyfhel, table: str, column: str, where: str = None, params=()) -> dict:
+    """
+    Compares homomorphic_sum_streaming with the homomorphic_sum aggregate on the same scan.
+
+    Returns:
+        dict: Milliseconds per row and peak traced Python memory (bytes) of each path, plus
+        the number of rows scanned.
+    """
+    for name in (table, column):
+        if not name.isidentifier():
+            raise ValueError(f"Invalid SQL identifier: {name!r}")
+
+    class BoundSumAggregate(HomomorphicSumAggregate):
+        def __init__(self):
+            self.he = he
+            self.total_ctxt = None
+            self.scratch_ctxt = PyCtxt(pyfhel=he)
+
+    conn.create_aggregate("homomorphic_sum_benchmark", 1, BoundSumAggregate)
+    filter_sql = f" WHERE {where}" if where else ""
+    n_rows = conn.execute(f"SELECT COUNT({column}) FROM {table}{filter_sql}", params).fetchone()[0]
+    paths = {
+        'aggregate': lambda: conn.execute(
+            f"SELECT homomorphic_sum_benchmark({column}) FROM {table}{filter_sql}", params).fetchone()[0],
+        'streaming': lambda: homomorphic_sum_streaming(conn, he, table, column, where, params),
+    }
+    results = {'rows': n_rows}
+    for name, run in paths.items():
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {'ms_per_row': elapsed / max(n_rows, 1) * 1e3, 'peak_bytes': peak}
+    logger.info(f"Streaming benchmark over '{table}.{column}': {results}")
+    return results
+
+@lru_cache(maxsize=None)
+def shared_pyfhel(context_path: str, public_key_path: str) -> Pyfhel:
+    """
+    Returns a process-wide Pyfhel instance, loading the context and public key only once.
+    """
+    return initialize_pyfhel(context_path, public_key_path)
+
+@lru_cache(maxsize=None)
+def shared_plaintext_cache(context_path: str, public_key_path: str, maxsize: int = 1024):
+    """
+    Returns a process-wide EncodedPlaintextCache bound to the shared Pyfhel instance.
+
+    SQLite instantiates a fresh aggregate object for every query, so sharing the Pyfhel
+    instance and its encoded plaintexts is what lets repeated weights skip re-encoding.
+    """
+    return EncodedPlaintextCache(shared_pyfhel(context_path, public_key_path), maxsize=maxsize)
+
+class EncodedPlaintextCache:
+    """
+    LRU cache of plaintext weights encoded (in NTT form) for plaintext-ciphertext multiplication.
+    """
+    def __init__(self, he: Pyfhel, maxsize: int = 1024):
+        self.he = he
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._ptxts = OrderedDict()
+
+    def get(self, weight: float):
+        """
+        Returns the encoded plaintext for a weight, encoding it on a miss.
+
+        Parameters:
+            weight (float): Plaintext weight.
+
+        Returns:
+            PyPtxt: The encoded weight, at the same scale and level as fresh ciphertexts.
+        """
+        weight = float(weight)
+        ptxt = self._ptxts.get(weight)
+        if ptxt is not None:
+            self._ptxts.move_to_end(weight)
+            self.hits += 1
+            return ptxt
+        self.misses += 1
+        ptxt = self.he.encodeFrac(np.array([weight], dtype=np.float64))
+        self._ptxts[weight] = ptxt
+        if len(self._ptxts) > self.maxsize:
+            self._ptxts.popitem(last=False)
+        return ptxt
+
+def homomorphic_weighted_sum_py(he: Pyfhel, ciphertexts, weights, cache: EncodedPlaintextCache = None) -> bytes:
+    """
+    Computes the dot product of encrypted values with plaintext weights.
+
+    Every product stays at the doubled scale so they can be accumulated directly, and the
+    total is rescaled once at the end instead of once per row.
+
+    Parameters:
+        he (Pyfhel): An initialized Pyfhel object with loaded context and keys.
+        ciphertexts (Iterable[bytes]): Ciphertexts in bytes format.
+        weights (Iterable[float]): Plaintext weights, one per ciphertext.
+        cache (EncodedPlaintextCache, optional): Cache of encoded weights to reuse.
+
+    Returns:
+        bytes: The aggregated ciphertext as bytes, or None if every weight was zero.
+    """
+    cache = cache or EncodedPlaintextCache(he)
+    total_ctxt = None
+    scratch_ctxt = PyCtxt(pyfhel=he)
+    for ct, weight in zip(ciphertexts, weights):
+        total_ctxt = _accumulate_weighted(cache, total_ctxt, scratch_ctxt, ct, weight)
+    if total_ctxt is None:
+        return None
+    he.rescale_to_next(total_ctxt)
+    return total_ctxt.to_bytes()
+
+homomorphic_dot_py = homomorphic_weighted_sum_py
+
+def _accumulate_weighted(cache, total_ctxt, scratch_ctxt, value, weight):
+    """
+    Adds weight * value to the running total without rescaling, returning the new total.
+    """
+    if value is None or weight is None or weight == 0:
+        # SEAL refuses to produce the transparent ciphertext a zero weight would yield.
+        return total_ctxt
+    ptxt = cache.get(weight)
+    if total_ctxt is None:
+        total_ctxt = load_ciphertext(cache.he, value)
+        cache.he.multiply_plain(total_ctxt, ptxt)
+        return total_ctxt
+    load_ciphertext(cache.he, value, scratch_ctxt)
+    # from_bytes keeps the Python-side level that multiply_plain bumped on the previous row;
+    # left stale, += would mod-switch the scratch ciphertext below the total.
+    scratch_ctxt.mod_level = 0
+    cache.he.multiply_plain(scratch_ctxt, ptxt)
+    total_ctxt += scratch_ctxt
+    return total_ctxt
+
+class HomomorphicWeightedSumAggregate:
+    """
+    SQLite aggregate function class for plaintext-weighted homomorphic summation (dot products).
+
+    Registered as ``homomorphic_weighted_sum(col, weight)``. Encoded weights come from a
+    process-wide LRU cache and the single rescale happens in finalize.
+    """
+    def __init__(self):
+        current_dir = Path(__file__).parent.parent  # Adjust based on directory structure
+        context_path = current_dir / "context.ckks"
+        public_key_path = current_dir / "public_key.pk"
+
+        try:
+            self.cache = shared_plaintext_cache(str(context_path), str(public_key_path))
+            self.he = self.cache.he
+            self.total_ctxt = None
+            self.scratch_ctxt = PyCtxt(pyfhel=self.he)
+            logger.info("HomomorphicWeightedSumAggregate initialized with shared context and public key.")
+        except FileNotFoundError as e:
+            logger.error(f"Initialization failed: {e}")
+            raise
+
+    def step(self, value, weight):
+        """
+        Process each row's value and weight.
+
+        Parameters:
+            value (bytes): The ciphertext in bytes format.
+            weight (float): The plaintext weight of the row.
+        """
+        self.total_ctxt = _accumulate_weighted(self.cache, self.total_ctxt, self.scratch_ctxt, value, weight)
+
+    def finalize(self):
+        """
+        Rescale the accumulated products once and return the aggregated ciphertext.
+
+        Returns:
+            bytes: The aggregated ciphertext as bytes, or None if no data was aggregated.
+        """
+        if self.total_ctxt is None:
+            logger.warning("HomomorphicWeightedSumAggregate: No ciphertexts were aggregated.")
+            return None
+        self.he.rescale_to_next(self.total_ctxt)
+        logger.info("HomomorphicWeightedSumAggregate: Finalizing aggregated ciphertext.")
+        return self.total_ctxt.to_bytes()
+
+class HomomorphicApproxSumAggregate:
+    """
+    SQLite aggregate function class for approximate summation over a sample table.
+
+    Registered as ``homomorphic_sum_approx(col, stratum, stratum_population, fraction)``. For
+    every stratum it accumulates the encrypted sum and sum of squares of the sampled values
+    along with the row count; finalize packs them into a bundle that
+    Scripts.sampling.decrypt_approximate_sum turns into an estimate and confidence interval.
+    """
+    def __init__(self):
+        current_dir = Path(__file__).parent.parent  # Adjust based on directory structure
+        context_path = current_dir / "context.ckks"
+        public_key_path = current_dir / "public_key.pk"
+
+        try:
+            self.he = shared_pyfhel(str(context_path), str(public_key_path))
+            self.strata = {}
+            self.scratch_ctxt = PyCtxt(pyfhel=self.he)
+            logger.info("HomomorphicApproxSumAggregate initialized with shared context and public key.")
+        except FileNotFoundError as e:
+            logger.error(f"Initialization failed: {e}")
+            raise
+
+    def step(self, value, stratum, stratum_population, fraction):
+        """
+        Process each sampled row.
+
+        Parameters:
+            value (bytes): The ciphertext in bytes format.
+            stratum (int): Stratum of the row.
+            stratum_population (int): Number of source rows in the stratum, or None for Bernoulli samples.
+            fraction (float): Sampling fraction the query reads.
+        """
+        if value is None:
+            return
+        entry = self.strata.get(stratum)
+        if entry is None:
+            ctxt = load_ciphertext(self.he, value)
+            self.strata[stratum] = {
+                'stratum': stratum,
+                'n': 1,
+                'population': stratum_population,
+                'fraction': fraction,
+                'sum': ctxt,
+                'sum_sq': self.he.square(ctxt, in_new_ctxt=True),
+            }
+            return
+        ctxt = load_ciphertext(self.he, value, self.scratch_ctxt)
+        entry['sum_sq'] += self.he.square(ctxt, in_new_ctxt=True)
+        entry['sum'] += ctxt
+        entry['n'] += 1
+
+    def finalize(self):
+        """
+        Return the packed per-stratum aggregates.
+
+        Returns:
+            bytes: The bundle, or None if no rows were sampled.
+        """
+        if not self.strata:
+            logger.warning("HomomorphicApproxSumAggregate: No ciphertexts were aggregated.")
+            return None
+        logger.info(f"HomomorphicApproxSumAggregate: Finalizing {len(self.strata)} strata.")
+        return pack_bundle([
+            dict(entry, sum=entry['sum'].to_bytes(), sum_sq=entry['sum_sq'].to_bytes())
+            for entry in self.strata.values()
+        ])
+
+def benchmark_weighted_sum(he: Pyfhel, n_rows: int = 1000, n_distinct_weights: int = 10, seed: int = 0) -> dict:
+    """
+    Compares the cached, single-rescale weighted sum against naive per-row encoding.
+
+    The naive path encodes the weight, multiplies and rescales on every row before adding.
+
+    Returns:
+        dict: Wall-clock seconds of both paths, the speedup and the cache hit rate.
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(0, 10, size=n_rows)
+    weights = rng.choice(rng.uniform(0.5, 2.0, size=n_distinct_weights), size=n_rows)
+    ciphertexts = [he.encryptPtxt(he.encodeFrac(np.array([v], dtype=np.float64))).to_bytes() for v in values]
+
+    start_time = time.perf_counter()
+    naive_total = None
+    for ct, weight in zip(ciphertexts, weights):
+        ctxt = PyCtxt(pyfhel=he, bytestring=ct)
+        he.multiply_plain(ctxt, he.encodeFrac(np.array([weight], dtype=np.float64)))
+        he.rescale_to_next(ctxt)
+        if naive_total is None:
+            naive_total = ctxt
+        else:
+            naive_total += ctxt
+    naive_bytes = naive_total.to_bytes()
+    naive_seconds = time.perf_counter() - start_time
+
+    cache = EncodedPlaintextCache(he)
+    start_time = time.perf_counter()
+    cached_bytes = homomorphic_weighted_sum_py(he, ciphertexts, weights, cache=cache)
+    cached_seconds = time.perf_counter() - start_time
+
+    expected = float(np.dot(values, weights))
+    results = {
+        'naive_seconds': naive_seconds,
+        'cached_seconds': cached_seconds,
+        'speedup': naive_seconds / cached_seconds,
+        'cache_hit_rate': cache.hits / n_rows,
+        'naive_error': abs(he.decryptFrac(PyCtxt(pyfhel=he, bytestring=naive_bytes))[0] - expected),
+        'cached_error': abs(he.decryptFrac(PyCtxt(pyfhel=he, bytestring=cached_bytes))[0] - expected),
+    }
+    logger.info(f"Weighted sum benchmark over {n_rows} rows: {results}")
+    return results
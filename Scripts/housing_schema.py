@@ -0,0 +1,42 @@
+# Scripts/housing_schema.py
+
+COLUMNS = [
+    'MedInc_enc',
+    'HouseAge_enc',
+    'Population_enc',
+    'AveRooms_enc',
+    'AveOccup_enc',
+    'Longitude_enc',
+    'Latitude_enc',
+    'MedHouseVal_enc',
+    'AveBedrms_enc',
+]
+
+SAMPLE_DATA = [
+    (8.3252, 41, 880, 6.9841, 1.0238, -122.23, 37.88, 452600, 2.555),
+    (8.3014, 21, 1262, 6.2381, 0.9719, -122.22, 37.86, 358500, 2.109),
+]
+
+def insert_sql(table='housing_encrypted'):
+    """
+    Returns the parameterized statement inserting one encrypted row, in COLUMNS order, into ``table``.
+    """
+    return f"""
+    INSERT INTO {table} ({', '.join(COLUMNS)})
+    VALUES ({', '.join('?' for _ in COLUMNS)});
+"""
+
+INSERT_SQL = insert_sql()
+
+def encrypt_rows(he_instance, rows):
+    """
+    Encrypts a batch of plaintext rows column by column.
+
+    Args:
+        he_instance (HE): HE handler with the context and public key loaded.
+        rows (Iterable[Sequence[float]]): Plaintext rows in COLUMNS order.
+
+    Returns:
+        List[tuple]: One tuple of ciphertext bytes per input row.
+    """
+    return [tuple(he_instance.encrypt_value(value) for value in row) for row in rows]
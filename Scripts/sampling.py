@@ -0,0 +1,236 @@
+# Scripts/sampling.py
+
+import json
+import logging
+import math
+import re
+import struct
+from statistics import NormalDist
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BUNDLE_MAGIC = b"HAS1"
+_HEADER_LENGTH = struct.Struct("<I")
+_SUM_RE = re.compile(r'\bhomomorphic_sum\s*\(\s*([A-Za-z_]\w*)\s*\)', re.IGNORECASE)
+_CLAUSE_END_RE = re.compile(r'\b(GROUP\s+BY|ORDER\s+BY|LIMIT)\b|;', re.IGNORECASE)
+
+
+def sample_table_name(source: str) -> str:
+    return f"{source}_sample"
+
+
+def build_sample_table(conn, source='housing_encrypted', fraction=0.1, method='bernoulli',
+                       n_strata=10, seed=None, batch_size=1000) -> int:
+    """
+    Materializes a random sample of an encrypted table for approximate aggregation.
+
+    Every source row gets a ``sample_u`` and is copied when it falls below ``fraction``.
+    Because ``sample_u`` is kept, queries can later read any smaller fraction of the sample
+    with ``WHERE sample_u < ?``. With ``method='bernoulli'`` it is a uniform draw, so the
+    sample size itself is random. With ``method='stratified'`` the rows are split into
+    ``n_strata`` equal rowid ranges and ``sample_u`` is the midpoint of the row's slot in a
+    random ordering of its stratum, so every fraction selects exactly
+    ``stratum_sample_size(N_h, fraction)`` rows per stratum, a simple random sample without
+    replacement. Each sampled row records its stratum and the stratum population ``N_h``.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to the encrypted database.
+        source (str): Table to sample.
+        fraction (float): Largest sampling fraction that will be queried.
+        method (str): 'bernoulli' or 'stratified'.
+        n_strata (int): Number of strata for stratified sampling.
+        seed (int, optional): Seed for reproducible samples.
+        batch_size (int): Rows copied per executemany call.
+
+    Returns:
+        int: Number of sampled rows.
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError("fraction must be in (0, 1].")
+    if method not in ('bernoulli', 'stratified'):
+        raise ValueError(f"Unsupported sampling method: {method}")
+    if not source.isidentifier():
+        raise ValueError(f"Invalid SQL identifier: {source!r}")
+
+    sample = sample_table_name(source)
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({source})")]
+    if not columns:
+        raise ValueError(f"Table '{source}' does not exist.")
+    conn.execute(f"DROP TABLE IF EXISTS {sample}")
+    conn.execute(f"""
+        CREATE TABLE {sample} AS
+        SELECT rowid AS source_rowid, *, 0.0 AS sample_u, 0 AS stratum, 0 AS stratum_population
+        FROM {source} WHERE 0
+    """)
+
+    rowids = np.array([row[0] for row in conn.execute(f"SELECT rowid FROM {source} ORDER BY rowid")], dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    if method == 'stratified' and len(rowids):
+        strata = np.minimum(np.arange(len(rowids)) * n_strata // len(rowids), n_strata - 1)
+        populations = np.bincount(strata, minlength=n_strata)
+        u = np.empty(len(rowids))
+        for h in np.flatnonzero(populations):
+            members = np.flatnonzero(strata == h)
+            u[members] = (rng.permutation(len(members)) + 0.5) / len(members)
+    else:
+        u = rng.random(len(rowids))
+        strata = np.zeros(len(rowids), dtype=np.int64)
+        populations = None
+
+    insert_sql = f"""
+        INSERT INTO {sample} SELECT rowid, *, ?, ?, ? FROM {source} WHERE rowid = ?
+    """
+    selected = np.flatnonzero(u < fraction)
+    for start in range(0, len(selected), batch_size):
+        batch = selected[start:start + batch_size]
+        conn.executemany(insert_sql, [
+            (float(u[i]), int(strata[i]), int(populations[strata[i]]) if populations is not None else None, int(rowids[i]))
+            for i in batch
+        ])
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{sample}_u ON {sample} (sample_u)")
+    conn.commit()
+    logger.info(f"Materialized {len(selected)} of {len(rowids)} rows of '{source}' into '{sample}' "
+                f"({method}, fraction {fraction}).")
+    return len(selected)
+
+
+def stratum_sample_size(population: int, fraction: float) -> int:
+    """
+    Rows a stratified sample selects from a stratum of ``population`` rows at ``fraction``.
+
+    Mirrors the ``sample_u < fraction`` comparison against the stored midpoints (r + 0.5) / N_h.
+    """
+    n = min(max(math.ceil(fraction * population - 0.5), 0), population)
+    while n > 0 and (n - 0.5) / population >= fraction:
+        n -= 1
+    while n < population and (n + 0.5) / population < fraction:
+        n += 1
+    return n
+
+
+def approximate_query(query: str, fraction: float, source='housing_encrypted'):
+    """
+    Rewrites an exact homomorphic_sum query template to run on the sample table.
+
+    ``homomorphic_sum(col)`` becomes ``homomorphic_sum_approx(col, stratum, stratum_population, ?)``,
+    the source table is replaced by its sample and ``sample_u < ?`` is added to the filter.
+
+    Returns:
+        Tuple[str, list, list]: The rewritten query and the fixed parameters to bind before
+        and after the original ones.
+    """
+    if not _SUM_RE.search(query):
+        raise ValueError(f"Query has no homomorphic_sum to approximate: {query}")
+    sql = _SUM_RE.sub(r'homomorphic_sum_approx(\1, stratum, stratum_population, ?)', query)
+    sql = re.sub(rf'\bFROM\s+{source}\b', f'FROM {sample_table_name(source)}', sql, flags=re.IGNORECASE)
+
+    end = _CLAUSE_END_RE.search(sql)
+    head, tail = (sql[:end.start()], sql[end.start():]) if end else (sql, '')
+    keyword = 'AND' if re.search(r'\bWHERE\b', head, re.IGNORECASE) else 'WHERE'
+    sql = f"{head.rstrip()} {keyword} sample_u < ?" + (f" {tail}" if tail else '')
+    return sql, [fraction], [fraction]
+
+
+def pack_bundle(strata) -> bytes:
+    """
+    Serializes the per-stratum aggregates returned by homomorphic_sum_approx.
+
+    Parameters:
+        strata (list): Dicts with stratum, n, population and fraction plus the ``sum`` and
+            ``sum_sq`` ciphertext bytes.
+    """
+    header, blobs = [], []
+    for stratum in strata:
+        header.append({
+            'stratum': stratum['stratum'],
+            'n': stratum['n'],
+            'population': stratum['population'],
+            'fraction': stratum['fraction'],
+            'sum_len': len(stratum['sum']),
+            'sum_sq_len': len(stratum['sum_sq']),
+        })
+        blobs += [stratum['sum'], stratum['sum_sq']]
+    header_bytes = json.dumps(header).encode()
+    return b"".join([BUNDLE_MAGIC, _HEADER_LENGTH.pack(len(header_bytes)), header_bytes] + blobs)
+
+
+def unpack_bundle(bundle: bytes):
+    """
+    Inverse of pack_bundle.
+    """
+    if bundle[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+        raise ValueError("Value is not an approximate aggregation bundle.")
+    offset = len(BUNDLE_MAGIC)
+    (header_length,) = _HEADER_LENGTH.unpack_from(bundle, offset)
+    offset += _HEADER_LENGTH.size
+    strata = json.loads(bundle[offset:offset + header_length])
+    offset += header_length
+    for stratum in strata:
+        stratum['sum'] = bundle[offset:offset + stratum['sum_len']]
+        offset += stratum['sum_len']
+        stratum['sum_sq'] = bundle[offset:offset + stratum['sum_sq_len']]
+        offset += stratum['sum_sq_len']
+    return strata
+
+
+def approximate_interval(strata, confidence=0.95):
+    """
+    Computes the estimate and confidence interval from decrypted per-stratum moments.
+
+    The aggregate only sees sampled rows that pass the query's filter, so both designs use
+    domain estimators that treat filtered-out sampled rows as zeros. Bernoulli samples (no
+    stratum population) use the Horvitz-Thompson estimator sum / p with variance
+    (1 - p) / p^2 * sum_sq. Stratified samples know their size n_h per stratum, so they use
+    N_h / n_h * sum_h with the stratified simple random sampling variance
+    N_h^2 (1 - n_h / N_h) / n_h * s_h^2, where s_h^2 is the sample variance over all n_h rows.
+
+    Parameters:
+        strata (list): Dicts with n, population, fraction and the decrypted sum and sum_sq.
+        confidence (float): Coverage of the two-sided normal interval.
+
+    Returns:
+        Tuple[float, float, float]: The estimate and the interval's lower and upper bounds.
+    """
+    estimate, variance = 0.0, 0.0
+    for stratum in strata:
+        if not stratum['n']:
+            continue
+        p, population = stratum['fraction'], stratum.get('population')
+        sum_sq = max(stratum['sum_sq'], 0.0)
+        if population is None:
+            estimate += stratum['sum'] / p
+            variance += (1 - p) / p ** 2 * sum_sq
+            continue
+        n = stratum_sample_size(population, p)
+        estimate += population / n * stratum['sum']
+        if n > 1:
+            s2 = max(sum_sq - stratum['sum'] ** 2 / n, 0.0) / (n - 1)
+            variance += population ** 2 * (1 - n / population) / n * s2
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    margin = z * math.sqrt(variance)
+    return estimate, estimate - margin, estimate + margin
+
+
+def decrypt_approximate_sum(he, bundle: bytes, confidence=0.95):
+    """
+    Decrypts a homomorphic_sum_approx result into an estimate with its confidence interval.
+
+    Parameters:
+        he (Pyfhel): Pyfhel instance holding the secret key.
+        bundle (bytes): Value returned by the homomorphic_sum_approx aggregate.
+        confidence (float): Coverage of the interval.
+
+    Returns:
+        Tuple[float, float, float]: The estimate and the interval's lower and upper bounds.
+    """
+    from Scripts.ciphertext_codec import load_ciphertext
+
+    strata = unpack_bundle(bundle)
+    for stratum in strata:
+        stratum['sum'] = float(he.decryptFrac(load_ciphertext(he, stratum['sum']))[0])
+        stratum['sum_sq'] = float(he.decryptFrac(load_ciphertext(he, stratum['sum_sq']))[0])
+    return approximate_interval(strata, confidence)
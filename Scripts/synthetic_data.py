@@ -0,0 +1,138 @@
+# Scripts/synthetic_data.py
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Plaintext columns in the order of the housing_encrypted table.
+FEATURES = ['MedInc', 'HouseAge', 'Population', 'AveRooms', 'AveOccup', 'Longitude', 'Latitude', 'MedHouseVal', 'AveBedrms']
+
+# Marginals fitted to the California housing dataset (20640 block groups). Skewed columns are
+# log-normal, given by their median and log-space standard deviation, so that the outliers
+# of the real data do not inflate the bulk of the distribution.
+MARGINALS = {
+    'MedInc': ('lognormal', 3.53, 0.47, 0.4999, 15.0001, False),
+    'HouseAge': ('normal', 28.64, 12.59, 1.0, 52.0, True),
+    'Population': ('lognormal', 1166.0, 0.74, 3.0, 35682.0, True),
+    'AveRooms': ('lognormal', 5.23, 0.25, 0.846, 141.91, False),
+    'AveOccup': ('lognormal', 2.82, 0.25, 0.692, 1243.33, False),
+    'Longitude': ('normal', -119.57, 2.00, -124.35, -114.31, False),
+    'Latitude': ('normal', 35.63, 2.14, 32.54, 41.95, False),
+    'MedHouseVal': ('lognormal', 179700.0, 0.56, 14999.0, 500001.0, False),
+    'AveBedrms': ('lognormal', 1.05, 0.11, 0.333, 34.07, False),
+}
+
+# Pearson correlations of the dataset, in FEATURES order, used for the latent Gaussian copula.
+CORRELATION = np.array([
+    #  MedInc  HAge    Pop     AveRm   AveOcc  Lon     Lat     Value   AveBr
+    [1.000, -0.119, 0.005, 0.327, 0.019, -0.015, -0.080, 0.688, -0.062],
+    [-0.119, 1.000, -0.296, -0.153, 0.013, -0.108, 0.011, 0.106, -0.078],
+    [0.005, -0.296, 1.000, -0.072, 0.070, 0.100, -0.109, -0.025, -0.066],
+    [0.327, -0.153, -0.072, 1.000, -0.005, -0.028, 0.106, 0.152, 0.848],
+    [0.019, 0.013, 0.070, -0.005, 1.000, 0.002, 0.002, -0.024, -0.006],
+    [-0.015, -0.108, 0.100, -0.028, 0.002, 1.000, -0.925, -0.046, 0.013],
+    [-0.080, 0.011, -0.109, 0.106, 0.002, -0.925, 1.000, -0.144, 0.070],
+    [0.688, 0.106, -0.025, 0.152, -0.024, -0.046, -0.144, 1.000, -0.047],
+    [-0.062, -0.078, -0.066, 0.848, -0.006, 0.013, 0.070, -0.047, 1.000],
+])
+
+# Column layout of the original StatLib cal_housing.data file.
+STATLIB_COLUMNS = ['longitude', 'latitude', 'housingMedianAge', 'totalRooms', 'totalBedrooms',
+                   'population', 'households', 'medianIncome', 'medianHouseValue']
+
+
+class CaliforniaHousingGenerator:
+    """
+    Generates synthetic rows with the marginal distributions and correlations of the
+    California housing dataset, using a Gaussian copula.
+
+    Rows are drawn from a single seeded stream, so the same seed yields the same rows
+    regardless of the chunk size they are requested in.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self._cholesky = np.linalg.cholesky(CORRELATION)
+        self._marginals = [MARGINALS[name] for name in FEATURES]
+
+    def generate(self, n_rows):
+        """
+        Returns an (n_rows, len(FEATURES)) array of plaintext rows.
+        """
+        latent = self.rng.standard_normal((n_rows, len(FEATURES))) @ self._cholesky.T
+        rows = np.empty_like(latent)
+        for column, (kind, center, spread, low, high, integer) in enumerate(self._marginals):
+            if kind == 'lognormal':
+                values = center * np.exp(spread * latent[:, column])
+            else:
+                values = center + spread * latent[:, column]
+            values = np.clip(values, low, high)
+            rows[:, column] = np.round(values) if integer else values
+        return rows
+
+    def iter_chunks(self, n_rows, chunk_size=10000):
+        """
+        Yields arrays of at most chunk_size rows until n_rows have been generated.
+        """
+        for start in range(0, n_rows, chunk_size):
+            yield self.generate(min(chunk_size, n_rows - start))
+
+
+def load_california_housing(path, chunk_size=10000, n_rows=None):
+    """
+    Streams the real California housing dataset from a local file in FEATURES order.
+
+    Accepts either a CSV with the scikit-learn column names (MedHouseVal in units of
+    $100,000 is converted to dollars) or the original StatLib cal_housing.data file, from
+    which the per-household averages are derived.
+
+    Parameters:
+        path (str): Path to the CSV or .data file.
+        chunk_size (int): Rows per yielded chunk.
+        n_rows (int, optional): Stop after this many rows.
+
+    Yields:
+        np.ndarray: Arrays of at most chunk_size rows.
+    """
+    path = Path(path)
+    with open(path, mode='r') as file:
+        has_header = 'MedInc' in file.readline()
+    if has_header:
+        reader = pd.read_csv(path, chunksize=chunk_size)
+    else:
+        reader = pd.read_csv(path, header=None, names=STATLIB_COLUMNS, chunksize=chunk_size)
+
+    value_scale = None
+    remaining = n_rows
+    for frame in reader:
+        if not has_header:
+            households = frame['households']
+            frame = pd.DataFrame({
+                'MedInc': frame['medianIncome'],
+                'HouseAge': frame['housingMedianAge'],
+                'Population': frame['population'],
+                'AveRooms': frame['totalRooms'] / households,
+                'AveOccup': frame['population'] / households,
+                'Longitude': frame['longitude'],
+                'Latitude': frame['latitude'],
+                'MedHouseVal': frame['medianHouseValue'],
+                'AveBedrms': frame['totalBedrooms'] / households,
+            })
+        if value_scale is None:
+            value_scale = 100000.0 if frame['MedHouseVal'].max() < 100 else 1.0
+        rows = frame[FEATURES].to_numpy(dtype=np.float64)
+        rows[:, FEATURES.index('MedHouseVal')] *= value_scale
+        if remaining is not None:
+            rows = rows[:remaining]
+            remaining -= len(rows)
+        if len(rows):
+            yield rows
+        if remaining is not None and remaining <= 0:
+            break
+    logger.info(f"Finished streaming California housing rows from {path}.")
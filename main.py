@@ -3,6 +3,7 @@ from stable_baselines3 import PPO
 from stable_baselines3.common.env_checker import check_env
 import torch
 from rl_agent.DatabaseIndexEnv import DatabaseIndexEnv
+from rl_agent.TelemetryWriter import TelemetryWriter
 from Scripts.generate_data import create_encrypted_db_with_dummy_data
 
 def main():
@@ -10,7 +11,8 @@ def main():
     create_encrypted_db_with_dummy_data()  
 
     print("Initializing the environment...")
-    env = DatabaseIndexEnv()  
+    telemetry = TelemetryWriter("telemetry")
+    env = DatabaseIndexEnv(telemetry=telemetry)  
 
     print("Checking the environment...")
     check_env(env)  # Check if the environment follows Gym's API
@@ -36,6 +38,9 @@ def main():
     env.close()
     print("Environment closed.")
 
+    telemetry.close()
+    print("Telemetry written to 'telemetry/'.")
+
 if __name__ == "__main__":
     main()
 
@@ -5,11 +5,16 @@ import sqlite3
 import random
 import time
 import csv
+from collections import deque
+from dataclasses import replace
 from Pyfhel import PyCtxt
 
 from Scripts.generate_data import create_encrypted_db_with_dummy_data
 from Scripts.ckks import HE  
-from Scripts.homomorphic_sum import HomomorphicSumAggregate  
+from Scripts.homomorphic_sum import HomomorphicSumAggregate, HomomorphicWeightedSumAggregate, HomomorphicApproxSumAggregate
+from Scripts.sampling import approximate_query, sample_table_name
+from Scripts.ciphertext_codec import load_templates
+from rl_agent.WorkloadAnalyzer import WorkloadAnalyzer, load_workload
 
 import logging
 from tqdm import tqdm 
@@ -19,25 +24,39 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DatabaseIndexEnv(gym.Env):
-    def __init__(self, db_name='california_housing.db', max_steps=1):
+    def __init__(self, db_name='california_housing.db', max_steps=1, workload=None,
+                 workload_file=None, candidates=None, max_candidates=8, telemetry=None,
+                 episode_log_limit=10000, approximate_fraction=None):
         super(DatabaseIndexEnv, self).__init__()
         logger.info("Initializing DatabaseIndexEnv...")
+        if workload is not None and approximate_fraction is not None:
+            # Reads would hit the sample table while writes hit the source, so no index serves both
+            raise ValueError("A write workload cannot be combined with approximate_fraction.")
         self.db_name = db_name
         self.max_steps = max_steps
         self.current_step = 0
-        self.episode_logs = []
+        self.episode = 0
+        self.episode_logs = deque(maxlen=episode_log_limit)
+        self.episodes_logged = 0
+        self.telemetry = telemetry
+        self.active_index = None
+        self.workload = workload
         self.conn = self._create_connection()
         self.cursor = self.conn.cursor()
         self.he_instance = HE() 
 
+        # Register the templates needed to read compact ciphertexts, if the database has any
+        load_templates(self.conn)
+
         # Register homomorphic_sum as an aggregate function
         self.conn.create_aggregate("homomorphic_sum", 1, HomomorphicSumAggregate)
         logger.info("homomorphic_sum aggregate function registered in SQLite.")
+        for name in ("homomorphic_weighted_sum", "homomorphic_dot"):
+            self.conn.create_aggregate(name, 2, HomomorphicWeightedSumAggregate)
+        logger.info("homomorphic_weighted_sum and homomorphic_dot aggregate functions registered in SQLite.")
+        self.conn.create_aggregate("homomorphic_sum_approx", 4, HomomorphicApproxSumAggregate)
+        logger.info("homomorphic_sum_approx aggregate function registered in SQLite.")
 
-        # Set up action and observation spaces
-        self.action_space = spaces.Discrete(6)
-        self.observation_space = spaces.Box(low=0, high=np.inf, shape=(1,), dtype=np.float32)
-        self.state = np.array([0], dtype=np.float32)
         self.queries = [
             ("SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted WHERE HouseAge_enc > ?", [(10, 50)]),
             ("SELECT homomorphic_sum(Population_enc) FROM housing_encrypted WHERE AveRooms_enc > ?", [(1, 10)]),
@@ -47,6 +66,39 @@ class DatabaseIndexEnv(gym.Env):
             ("SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted WHERE Population_enc > ? AND Longitude_enc < ?", [(1000, 5000), (-120, -115)]),
         ]
 
+        weights = [1.0] * len(self.queries)
+        if workload_file is not None:
+            entries = load_workload(workload_file)
+            self.queries = [(query, param_ranges) for query, param_ranges, _ in entries]
+            weights = [weight for _, _, weight in entries]
+
+        # Derive the candidate indexes from the exact workload unless they are given explicitly
+        if candidates is None:
+            analyzer = WorkloadAnalyzer([(query, param_ranges, weight) for (query, param_ranges), weight
+                                         in zip(self.queries, weights)], max_candidates=max_candidates)
+            candidates = analyzer.candidates()
+            if approximate_fraction is not None:
+                # The sample table keeps the source columns, so the same indexes apply to it
+                candidates = [replace(c, table=sample_table_name(c.table)) if c.table == 'housing_encrypted' else c
+                              for c in candidates]
+        self.candidates = list(candidates)
+
+        # Trade accuracy for latency by aggregating over the materialized sample table
+        self.approximate_fraction = approximate_fraction
+        if approximate_fraction is not None:
+            self.queries = [self._approximate(query, param_ranges) for query, param_ranges in self.queries]
+            logger.info(f"Queries rewritten to read a {approximate_fraction:.2%} sample.")
+
+        # Set up action and observation spaces; action 0 leaves the table without an index
+        self.action_space = spaces.Discrete(len(self.candidates) + 1)
+        self.observation_space = spaces.Box(low=0, high=np.inf, shape=(1,), dtype=np.float32)
+        self.state = np.array([0], dtype=np.float32)
+
+    def _approximate(self, query, param_ranges):
+        sql, before, after = approximate_query(query, self.approximate_fraction)
+        # Fixed parameters are expressed as degenerate ranges so _execute_query binds them as-is
+        return sql, [(value, value) for value in before] + list(param_ranges) + [(value, value) for value in after]
+
     def _create_connection(self):
         logger.info("Creating database connection...")
         retries = 5
@@ -74,10 +126,21 @@ class DatabaseIndexEnv(gym.Env):
 
     def step(self, action):
         logger.info(f"Step {self.current_step + 1}/{self.max_steps}: Applying action {action}...")
+        step_start = time.perf_counter()
         self._set_index(action)
-
-        logger.info("Executing queries and measuring execution times...")
-        query_times = [self._execute_query(query, param_ranges) for query, param_ranges in self.queries]
+        set_index_seconds = time.perf_counter() - step_start
+
+        if self.workload is not None:
+            logger.info("Running mixed read/write workload...")
+            result = self.workload.run(self.conn, self.queries, self._execute_query)
+            query_times = result['query_times']
+            query_params = result['query_params']
+        else:
+            logger.info("Executing queries and measuring execution times...")
+            measurements = [self._execute_query(query, param_ranges) for query, param_ranges in self.queries]
+            query_times = [execution_time for execution_time, _ in measurements]
+            query_params = [params for _, params in measurements]
+        query_seconds = time.perf_counter() - step_start - set_index_seconds
         avg_query_time = np.mean(query_times)
         logger.info(f"Average query execution time: {avg_query_time:.6f} seconds")
 
@@ -87,9 +150,36 @@ class DatabaseIndexEnv(gym.Env):
         terminated = self.current_step >= self.max_steps
         truncated = False
 
-        info = {'avg_query_time': avg_query_time}
+        info = {
+            'avg_query_time': avg_query_time,
+            'query_times': query_times,
+            'query_params': query_params,
+            'index': self.active_index,
+        }
+        if self.workload is not None:
+            write_times = result['write_times']
+            avg_write_time = float(np.mean(write_times)) if write_times else 0.0
+            index_bytes = self.workload.index_storage_bytes(self.conn, [self.active_index])
+            reward = self.workload.reward(avg_query_time, avg_write_time, index_bytes)
+            info.update({'write_times': write_times, 'avg_write_time': avg_write_time, 'index_bytes': index_bytes})
         if terminated:
             self.episode_logs.append(avg_query_time)
+            self.episodes_logged += 1
+        if self.telemetry is not None:
+            self.telemetry.record(
+                episode=self.episode,
+                step=self.current_step,
+                action=int(action),
+                reward=float(reward),
+                index=self.active_index,
+                avg_query_time=float(avg_query_time),
+                query_times=query_times,
+                avg_write_time=info.get('avg_write_time'),
+                index_bytes=info.get('index_bytes'),
+                set_index_seconds=set_index_seconds,
+                query_seconds=query_seconds,
+                step_seconds=time.perf_counter() - step_start,
+            )
 
         return self.state, reward, terminated, truncated, info
 
@@ -100,41 +190,23 @@ class DatabaseIndexEnv(gym.Env):
             random.seed(seed)
 
         self.state = np.array([0], dtype=np.float32)
+        if self.current_step:
+            self.episode += 1
         self.current_step = 0
         return self.state, {}
 
     def _set_index(self, action):
         logger.info(f"Setting index for action {action}...")
-        index_names = [
-            'idx_medinc',
-            'idx_houseage',
-            'idx_medinc_houseage',
-            'idx_population_ave_rooms',
-            'idx_latitude_longitude',
-            'idx_ave_rooms_house_age'
-        ]
-        for index_name in index_names:
-            self.cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+        for candidate in self.candidates:
+            self.cursor.execute(candidate.drop_sql)
+        self.active_index = None
         logger.info("Existing indexes dropped.")
 
-        if action == 1:
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_medinc ON housing_encrypted (MedInc_enc)')
-            logger.info("Index idx_medinc created.")
-        elif action == 2:
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_houseage ON housing_encrypted (HouseAge_enc)')
-            logger.info("Index idx_houseage created.")
-        elif action == 3:
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_medinc_houseage ON housing_encrypted (MedInc_enc, HouseAge_enc)')
-            logger.info("Index idx_medinc_houseage created.")
-        elif action == 4:
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_population_ave_rooms ON housing_encrypted (Population_enc, AveRooms_enc)')
-            logger.info("Index idx_population_ave_rooms created.")
-        elif action == 5:
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_latitude_longitude ON housing_encrypted (Latitude_enc, Longitude_enc)')
-            logger.info("Index idx_latitude_longitude created.")
-        elif action == 6:
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_ave_rooms_house_age ON housing_encrypted (AveRooms_enc, HouseAge_enc)')
-            logger.info("Index idx_ave_rooms_house_age created.")
+        if action > 0:
+            candidate = self.candidates[action - 1]
+            self.cursor.execute(candidate.create_sql)
+            self.active_index = candidate.name
+            logger.info(f"Index {candidate.name} created.")
 
         self.conn.commit()
         logger.info("Index action committed.")
@@ -148,7 +220,7 @@ class DatabaseIndexEnv(gym.Env):
         end_time = time.time()
         execution_time = end_time - start_time
         logger.info(f"Query executed in {execution_time:.6f} seconds.")
-        return execution_time
+        return execution_time, params
 
     def close(self):
         logger.info("Closing environment and database connection...")
@@ -160,7 +232,9 @@ class DatabaseIndexEnv(gym.Env):
         with open(filename, mode='w', newline='') as file:
             writer = csv.writer(file)
             writer.writerow(['Episode', 'Average Query Time'])
+            # Older episodes may have been evicted from the bounded log; keep their numbering
+            first_episode = self.episodes_logged - len(self.episode_logs) + 1
             for i, avg_time in enumerate(self.episode_logs):
-                writer.writerow([i + 1, avg_time])
+                writer.writerow([first_episode + i, avg_time])
         logger.info(f"Episode logs saved to {filename}.")
 
@@ -0,0 +1,294 @@
+import logging
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import torch
+from stable_baselines3 import PPO
+
+from rl_agent.WorkloadAnalyzer import WorkloadAnalyzer
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Recommendation:
+    """
+    Outcome of a single recommendation request.
+    """
+    action: int
+    index: Optional[str]
+    applied: bool
+    reason: str
+    observation: float
+
+
+class IndexRecommender:
+    """
+    Serves index recommendations from a PPO policy saved by main.py.
+
+    The policy is loaded once on CPU and queried in inference mode. Concurrent calls to
+    ``recommend`` are queued and a single worker thread answers them in micro-batches, so
+    that one forward pass serves every request that arrived within ``max_wait`` seconds.
+    Observations are built from the live database by timing the workload queries, the same
+    way DatabaseIndexEnv does, and cached for ``observation_ttl`` seconds. Chosen index
+    changes are applied (or only logged in dry-run mode) at most once per ``cooldown``.
+    torch's thread pool is process-wide, so sizing it (``torch.set_num_threads``) is left
+    to the caller.
+
+    Observations and index changes run on whichever client thread calls ``recommend``, so
+    the database connection must be usable from any thread and have the homomorphic
+    aggregates registered. Pass ``db_path`` to have the recommender open such a connection;
+    a ``conn`` passed in must be opened with ``check_same_thread=False`` and have the
+    aggregates its queries use registered.
+    """
+
+    def __init__(self, model_path='ppo_index_optimizer', conn=None, queries=None, candidates=None,
+                 max_candidates=8, dry_run=True, cooldown=300.0, observation_ttl=60.0,
+                 max_batch=256, max_wait=0.0002, db_path=None):
+        self.model = PPO.load(model_path, device='cpu')
+        self.policy = self.model.policy
+        logger.info(f"Loaded policy from {model_path} on CPU.")
+
+        self._owns_conn = conn is None and db_path is not None
+        self.conn = self._open_connection(db_path) if self._owns_conn else conn
+        self.queries = queries or []
+        if candidates is None:
+            candidates = WorkloadAnalyzer(self.queries, max_candidates=max_candidates).candidates() if self.queries else []
+        self.candidates = list(candidates)
+        n_actions = self.model.action_space.n
+        if self.candidates and n_actions != len(self.candidates) + 1:
+            raise ValueError(f"Policy has {n_actions} actions but {len(self.candidates)} candidate indexes were given.")
+
+        self.dry_run = dry_run
+        self.cooldown = cooldown
+        self.observation_ttl = observation_ttl
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.active_index = None
+        self._last_change = float('-inf')
+        self._observation = None
+        self._observed_at = float('-inf')
+        self._db_lock = threading.Lock()
+
+        self._requests = queue.Queue()
+        self._running = True
+        self._worker = threading.Thread(target=self._serve, name='IndexRecommender', daemon=True)
+        self._worker.start()
+
+    @staticmethod
+    def _open_connection(db_path):
+        """
+        Opens a connection any client thread may use, with the homomorphic aggregates registered.
+        """
+        from Scripts.ciphertext_codec import load_templates
+        from Scripts.homomorphic_sum import (HomomorphicApproxSumAggregate, HomomorphicSumAggregate,
+                                             HomomorphicWeightedSumAggregate)
+
+        conn = sqlite3.connect(db_path, timeout=90, check_same_thread=False)
+        load_templates(conn)
+        conn.create_aggregate("homomorphic_sum", 1, HomomorphicSumAggregate)
+        for name in ("homomorphic_weighted_sum", "homomorphic_dot"):
+            conn.create_aggregate(name, 2, HomomorphicWeightedSumAggregate)
+        conn.create_aggregate("homomorphic_sum_approx", 4, HomomorphicApproxSumAggregate)
+        logger.info(f"Opened {db_path} with the homomorphic aggregates registered.")
+        return conn
+
+    def predict(self, observations):
+        """
+        Runs one deterministic forward pass over a batch of observations.
+
+        Parameters:
+            observations (np.ndarray): Array of shape (batch, 1).
+
+        Returns:
+            np.ndarray: The chosen action for every observation.
+        """
+        actions, _ = self.policy.predict(np.asarray(observations, dtype=np.float32), deterministic=True)
+        return actions
+
+    def _serve(self):
+        """
+        Worker loop: collects pending requests into a batch and answers them together.
+        """
+        while self._running:
+            try:
+                first = self._requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._running = False
+                    break
+                batch.append(item)
+
+            observations = np.array([[observation] for observation, _ in batch], dtype=np.float32)
+            try:
+                actions = self.predict(observations)
+            except Exception as e:
+                logger.error(f"Policy inference failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), action in zip(batch, actions):
+                future.set_result(int(action))
+
+    def submit(self, observation):
+        """
+        Queues an observation for batched inference.
+
+        Returns:
+            Future: Resolves to the chosen action.
+        """
+        future = Future()
+        self._requests.put((float(observation), future))
+        return future
+
+    def observe(self):
+        """
+        Returns the current average query latency, re-measuring it once the cached value expires.
+        """
+        with self._db_lock:
+            now = time.monotonic()
+            if self._observation is None or now - self._observed_at >= self.observation_ttl:
+                if self.conn is None or not self.queries:
+                    raise ValueError("A connection and queries are required to build live observations.")
+                cursor = self.conn.cursor()
+                query_times = []
+                for query, param_ranges in self.queries:
+                    params = [random.uniform(low, high) for low, high in param_ranges]
+                    start_time = time.perf_counter()
+                    cursor.execute(query, params)
+                    cursor.fetchall()
+                    query_times.append(time.perf_counter() - start_time)
+                self._observation = float(np.mean(query_times))
+                self._observed_at = now
+                logger.info(f"Observed average query time {self._observation:.6f} seconds.")
+            return self._observation
+
+    def recommend(self, observation=None, apply=True, timeout=None):
+        """
+        Recommends an index for the given (or live) observation and optionally applies it.
+
+        Parameters:
+            observation (float, optional): Average query latency; measured live when omitted.
+            apply (bool): Whether to act on the recommendation (subject to dry_run and cooldown).
+            timeout (float, optional): Seconds to wait for the batched inference.
+
+        Returns:
+            Recommendation: The chosen action and what was done with it.
+        """
+        if observation is None:
+            observation = self.observe()
+        action = self.submit(observation).result(timeout=timeout)
+        index = self.candidates[action - 1].name if self.candidates and action > 0 else None
+        if not apply:
+            return Recommendation(action, index, False, 'not requested', observation)
+        applied, reason = self._apply(action, index)
+        return Recommendation(action, index, applied, reason, observation)
+
+    def _apply(self, action, index):
+        """
+        Switches the active index, honoring dry-run mode and the cooldown between changes.
+        """
+        with self._db_lock:
+            if index == self.active_index:
+                return False, 'already active'
+            now = time.monotonic()
+            if now - self._last_change < self.cooldown:
+                return False, 'cooldown'
+            if self.dry_run:
+                logger.info(f"Dry run: would switch index from {self.active_index} to {index}.")
+                self._last_change = now
+                self.active_index = index
+                return False, 'dry run'
+            if self.conn is None:
+                raise ValueError("A connection is required to apply index changes.")
+
+            cursor = self.conn.cursor()
+            for candidate in self.candidates:
+                cursor.execute(candidate.drop_sql)
+            if action > 0:
+                cursor.execute(self.candidates[action - 1].create_sql)
+            self.conn.commit()
+            logger.info(f"Switched index from {self.active_index} to {index}.")
+            self._last_change = now
+            self.active_index = index
+            return True, 'applied'
+
+    def close(self):
+        """
+        Stops the batching worker and closes the connection if the recommender opened it.
+        """
+        self._running = False
+        self._requests.put(None)
+        self._worker.join()
+        if self._owns_conn:
+            self.conn.close()
+
+
+def benchmark_recommender(recommender, n_requests=10000, concurrency=8, observation_range=(0.0, 1.0)):
+    """
+    Measures recommendation throughput and latency with concurrent clients.
+
+    Requests carry random observations and are not applied, so only queueing, batching and
+    inference are measured.
+
+    Returns:
+        dict: Requests per second, latency percentiles in milliseconds and the latency of a
+        single unbatched forward pass.
+    """
+    rng = np.random.default_rng(0)
+    observations = rng.uniform(*observation_range, size=n_requests)
+
+    single = np.array([[observations[0]]], dtype=np.float32)
+    recommender.predict(single)
+    start_time = time.perf_counter()
+    for _ in range(1000):
+        recommender.predict(single)
+    forward_ms = (time.perf_counter() - start_time) / 1000 * 1e3
+
+    def timed_request(observation):
+        request_start = time.perf_counter()
+        recommender.recommend(observation, apply=False)
+        return time.perf_counter() - request_start
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = np.array(list(executor.map(timed_request, observations)))
+    elapsed = time.perf_counter() - start_time
+
+    results = {
+        'requests_per_sec': n_requests / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50) * 1e3),
+        'p99_ms': float(np.percentile(latencies, 99) * 1e3),
+        'single_forward_ms': forward_ms,
+    }
+    logger.info(f"Recommender benchmark: {results}")
+    return results
+
+
+if __name__ == "__main__":
+    torch.set_num_threads(1)
+    recommender = IndexRecommender()
+    try:
+        benchmark_recommender(recommender)
+    finally:
+        recommender.close()
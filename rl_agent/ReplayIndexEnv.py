@@ -0,0 +1,170 @@
+import logging
+from collections import defaultdict
+
+import gymnasium as gym
+from gymnasium import spaces
+import numpy as np
+
+from rl_agent.TransitionRecorder import load_transitions
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ReplayIndexEnv(gym.Env):
+    """
+    Offline counterpart of DatabaseIndexEnv that serves recorded measurements back.
+
+    The per-query execution times recorded by TransitionRecorder are grouped by action
+    and query. On every step, fresh query parameters are drawn from the query parameter
+    ranges and the execution time of each query is interpolated from the recorded samples
+    for the chosen action, so no DDL or query is ever executed against the database.
+
+    Only recorded actions are replayable, so the action space is dense over them: replay
+    action ``i`` serves the measurements of recorded action ``actions[i]``.
+
+    The reward keeps the objective the transitions were recorded under. Whatever the live
+    reward charged on top of the average query time (write latency and index storage under a
+    WorkloadEngine) is averaged per action and added to the interpolated query time, and the
+    recorded ``avg_write_time`` and ``index_bytes`` are reported in ``info``.
+    """
+
+    def __init__(self, dataset_path, max_steps=1, queries=None, n_neighbors=4):
+        super(ReplayIndexEnv, self).__init__()
+        logger.info(f"Initializing ReplayIndexEnv from {dataset_path}...")
+        self.max_steps = max_steps
+        self.n_neighbors = n_neighbors
+        self.current_step = 0
+        self.episode_logs = []
+
+        samples = defaultdict(lambda: defaultdict(lambda: ([], [])))
+        indexes = {}
+        penalties = defaultdict(list)
+        write_costs = defaultdict(list)
+        n_transitions = 0
+        for record in load_transitions(dataset_path):
+            info = record.get('info', {})
+            query_times = info.get('query_times')
+            query_params = info.get('query_params')
+            if query_times is None or query_params is None:
+                continue
+            action = int(record['action'])
+            indexes[action] = record.get('index')
+            avg_query_time = info.get('avg_query_time', np.mean(query_times))
+            penalties[action].append(float(record['reward']) + float(avg_query_time))
+            if info.get('avg_write_time') is not None:
+                write_costs[action].append((info['avg_write_time'], info.get('index_bytes') or 0))
+            for query_id, (params, execution_time) in enumerate(zip(query_params, query_times)):
+                samples[action][query_id][0].append(params)
+                samples[action][query_id][1].append(execution_time)
+            n_transitions += 1
+
+        if not n_transitions:
+            raise ValueError(f"No replayable transitions found in {dataset_path}.")
+
+        self.indexes = indexes
+        self._penalties = {action: float(np.mean(values)) for action, values in penalties.items()}
+        self._write_costs = {action: np.mean(costs, axis=0).tolist() for action, costs in write_costs.items()}
+        self.n_queries = max(len(per_query) for per_query in samples.values())
+        self._samples = {
+            action: {query_id: self._as_arrays(params, times) for query_id, (params, times) in per_query.items()}
+            for action, per_query in samples.items()
+        }
+
+        if queries is not None:
+            self.param_ranges = [np.asarray(param_ranges, dtype=np.float64).reshape(-1, 2)
+                                 for _, param_ranges in queries]
+        else:
+            self.param_ranges = self._infer_param_ranges()
+        self._spans = [np.where(ranges[:, 1] > ranges[:, 0], ranges[:, 1] - ranges[:, 0], 1.0)
+                       for ranges in self.param_ranges]
+
+        self.actions = sorted(self._samples)
+        self.action_space = spaces.Discrete(len(self.actions))
+        self.observation_space = spaces.Box(low=0, high=np.inf, shape=(1,), dtype=np.float32)
+        self.state = np.array([0], dtype=np.float32)
+        logger.info(f"Loaded {n_transitions} transitions covering actions {self.actions}.")
+
+    @staticmethod
+    def _as_arrays(params, times):
+        """
+        Stacks recorded samples into arrays, sorting 1-D samples once so they can be fed to np.interp.
+        """
+        params = np.asarray(params, dtype=np.float64).reshape(len(times), -1)
+        times = np.asarray(times, dtype=np.float64)
+        if params.shape[1] == 1:
+            order = np.argsort(params[:, 0])
+            params, times = params[order], times[order]
+        return params, times
+
+    def _infer_param_ranges(self):
+        """
+        Uses the observed parameter extremes of every query as its sampling range.
+        """
+        param_ranges = []
+        for query_id in range(self.n_queries):
+            recorded = [per_query[query_id][0] for per_query in self._samples.values() if query_id in per_query]
+            stacked = np.vstack(recorded)
+            param_ranges.append(np.column_stack([stacked.min(axis=0), stacked.max(axis=0)]))
+        return param_ranges
+
+    def _interpolate(self, action, query_id, params):
+        """
+        Estimates the execution time of a query for the given parameters.
+
+        One-dimensional parameter spaces are linearly interpolated; higher dimensions use
+        inverse-distance weighting over the nearest recorded samples, with each parameter
+        normalized by the width of its range.
+        """
+        recorded_params, recorded_times = self._samples[action][query_id]
+        if recorded_params.shape[1] == 1:
+            return float(np.interp(params[0], recorded_params[:, 0], recorded_times))
+
+        distances = np.linalg.norm((recorded_params - params) / self._spans[query_id], axis=1)
+        k = min(self.n_neighbors, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        if distances[nearest].min() == 0.0:
+            return float(recorded_times[nearest][distances[nearest] == 0.0].mean())
+        weights = 1.0 / distances[nearest]
+        return float(np.dot(weights, recorded_times[nearest]) / weights.sum())
+
+    def step(self, action):
+        if not 0 <= int(action) < len(self.actions):
+            raise ValueError(f"Action {action} is outside the {len(self.actions)} recorded actions.")
+        action = self.actions[int(action)]
+
+        query_times = []
+        query_params = []
+        for query_id, ranges in enumerate(self.param_ranges):
+            params = self.np_random.uniform(ranges[:, 0], ranges[:, 1])
+            query_params.append(params.tolist())
+            query_times.append(self._interpolate(action, query_id, params))
+        avg_query_time = float(np.mean(query_times))
+
+        reward = -avg_query_time + self._penalties[action]
+        self.state = np.array([avg_query_time], dtype=np.float32)
+        self.current_step += 1
+        terminated = self.current_step >= self.max_steps
+        truncated = False
+
+        info = {
+            'avg_query_time': avg_query_time,
+            'query_times': query_times,
+            'query_params': query_params,
+            'index': self.indexes.get(action),
+            'recorded_action': action,
+        }
+        if action in self._write_costs:
+            avg_write_time, index_bytes = self._write_costs[action]
+            info.update({'avg_write_time': avg_write_time, 'index_bytes': index_bytes})
+        if terminated:
+            self.episode_logs.append(avg_query_time)
+
+        return self.state, reward, terminated, truncated, info
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.state = np.array([0], dtype=np.float32)
+        self.current_step = 0
+        return self.state, {}
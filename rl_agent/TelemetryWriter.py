@@ -0,0 +1,168 @@
+import importlib.util
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_PART_RE = re.compile(r'part-(\d+)\.(?:parquet|csv)$')
+
+
+def _parquet_available():
+    return any(importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet'))
+
+
+def _part_columns(part_path):
+    """
+    Reads only the column names of a part file.
+    """
+    if part_path.suffix == '.csv':
+        return list(pd.read_csv(part_path, nrows=0).columns)
+    if importlib.util.find_spec('pyarrow') is not None:
+        import pyarrow.parquet as pq
+        return pq.read_schema(part_path).names
+    from fastparquet import ParquetFile
+    return list(ParquetFile(part_path).columns)
+
+
+def _flatten(record):
+    """
+    Expands list-valued fields such as per-query latencies into one column per element.
+    """
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, (list, tuple)):
+            for i, item in enumerate(value):
+                flat[f"{key}_{i}"] = item
+        elif isinstance(value, dict):
+            for sub_key, item in value.items():
+                flat[f"{key}_{sub_key}"] = item
+        else:
+            flat[key] = value
+    return flat
+
+
+class TelemetryWriter:
+    """
+    Streams per-step training telemetry to disk with bounded memory.
+
+    Records accumulate in a fixed-capacity buffer that a background thread drains every
+    ``flush_interval`` seconds into a new part file (Parquet when pyarrow or fastparquet is
+    installed, CSV otherwise) under ``path``. When the buffer fills up before the next
+    periodic flush, the recording thread flushes it itself, so memory stays bounded and at
+    most one buffer of records is lost on a crash.
+    """
+
+    def __init__(self, path='telemetry', capacity=10000, flush_interval=30.0, file_format='auto'):
+        if file_format == 'auto':
+            file_format = 'parquet' if _parquet_available() else 'csv'
+        if file_format not in ('parquet', 'csv'):
+            raise ValueError(f"Unsupported telemetry format: {file_format}")
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.file_format = file_format
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Continue after the highest existing part so no part file is ever overwritten
+        existing = [int(match.group(1)) for match in (_PART_RE.match(p.name) for p in self.path.iterdir()) if match]
+        self._part = max(existing) + 1 if existing else 0
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name='TelemetryWriter', daemon=True)
+        self._flusher.start()
+        logger.info(f"Writing {file_format} telemetry to {self.path}.")
+
+    def record(self, **fields):
+        """
+        Buffers one telemetry record; list and dict fields are flattened into columns.
+        """
+        fields.setdefault('timestamp', time.time())
+        with self._buffer_lock:
+            self._buffer.append(_flatten(fields))
+            full = len(self._buffer) >= self.capacity
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered records to a new part file.
+        """
+        with self._write_lock:
+            with self._buffer_lock:
+                records, self._buffer = self._buffer, []
+            if not records:
+                return
+            part_path = self.path / f"part-{self._part:06d}.{self.file_format}"
+            self._part += 1
+            frame = pd.DataFrame.from_records(records)
+            if self.file_format == 'parquet':
+                frame.to_parquet(part_path, index=False)
+            else:
+                frame.to_csv(part_path, index=False)
+        logger.debug(f"Flushed {len(records)} telemetry records to {part_path}.")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Telemetry flush failed: {e}")
+
+    def close(self):
+        """
+        Stops the background flusher and writes any remaining records.
+        """
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        logger.info(f"Telemetry writer at {self.path} closed.")
+
+
+class TelemetryReader:
+    """
+    Lazily reads the part files written by TelemetryWriter.
+    """
+
+    def __init__(self, path='telemetry'):
+        self.path = Path(path)
+
+    def parts(self):
+        return sorted(list(self.path.glob("part-*.parquet")) + list(self.path.glob("part-*.csv")))
+
+    def iter_chunks(self, columns=None):
+        """
+        Yields one DataFrame per part file, optionally restricted to some columns.
+
+        Only the requested columns are read from disk; columns a part predates are filled
+        with NaN.
+        """
+        for part_path in self.parts():
+            present = None
+            if columns is not None:
+                available = set(_part_columns(part_path))
+                present = [column for column in columns if column in available]
+            if part_path.suffix == '.parquet':
+                frame = pd.read_parquet(part_path, columns=present)
+            else:
+                frame = pd.read_csv(part_path, usecols=present)
+            if columns is not None and list(frame.columns) != list(columns):
+                frame = frame.reindex(columns=columns)
+            yield frame
+
+    def load(self, columns=None):
+        """
+        Concatenates every part file into a single DataFrame.
+        """
+        chunks = list(self.iter_chunks(columns))
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(chunks, ignore_index=True)
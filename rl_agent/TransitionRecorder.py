@@ -0,0 +1,113 @@
+import json
+import logging
+from pathlib import Path
+
+import gymnasium as gym
+import numpy as np
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _to_jsonable(value):
+    """
+    Converts numpy arrays and scalars (possibly nested in lists/dicts) into plain Python objects.
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {str(key): _to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(item) for item in value]
+    return value
+
+
+def load_transitions(path):
+    """
+    Lazily reads the transitions written by TransitionRecorder.
+
+    Parameters:
+        path (str): Path to the JSON Lines dataset.
+
+    Yields:
+        dict: One transition record per line.
+    """
+    with open(path, mode='r') as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                # A crash mid-write can leave a truncated last line behind.
+                logger.warning(f"Skipping malformed transition on line {line_number} of {path}: {e}")
+
+
+class TransitionRecorder(gym.Wrapper):
+    """
+    Environment wrapper that streams every transition to an append-only JSON Lines dataset.
+
+    Each record holds the state the action was taken in, the action, the reward, the next
+    state, the info dict and the index configuration that was active while the queries ran,
+    so that the measurements can later be served back by ReplayIndexEnv.
+    """
+
+    def __init__(self, env, path='transitions.jsonl', flush_every=100):
+        super(TransitionRecorder, self).__init__(env)
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.episode = 0
+        self.step_in_episode = 0
+        self._last_state = None
+        self._pending = 0
+        self._file = open(self.path, mode='a')
+        logger.info(f"Recording transitions to {self.path}.")
+
+    def reset(self, **kwargs):
+        state, info = self.env.reset(**kwargs)
+        if self.step_in_episode:
+            self.episode += 1
+        self.step_in_episode = 0
+        self._last_state = state
+        return state, info
+
+    def step(self, action):
+        next_state, reward, terminated, truncated, info = self.env.step(action)
+        record = {
+            'episode': self.episode,
+            'step': self.step_in_episode,
+            'state': _to_jsonable(self._last_state),
+            'action': _to_jsonable(action),
+            'reward': _to_jsonable(reward),
+            'next_state': _to_jsonable(next_state),
+            'terminated': bool(terminated),
+            'truncated': bool(truncated),
+            'index': _to_jsonable(info.get('index')),
+            'info': _to_jsonable(info),
+        }
+        self._file.write(json.dumps(record) + '\n')
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+        self.step_in_episode += 1
+        self._last_state = next_state
+        return next_state, reward, terminated, truncated, info
+
+    def flush(self):
+        """
+        Flushes buffered transitions to disk.
+        """
+        if not self._file.closed:
+            self._file.flush()
+        self._pending = 0
+
+    def close(self):
+        logger.info(f"Closing transition recorder at {self.path}...")
+        if not self._file.closed:
+            self._file.close()
+        self.env.close()
@@ -0,0 +1,205 @@
+import json
+import logging
+import re
+from dataclasses import dataclass
+from itertools import permutations
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_FROM_RE = re.compile(r'\bFROM\s+([A-Za-z_]\w*)', re.IGNORECASE)
+_WHERE_RE = re.compile(r'\bWHERE\b(.*?)(?:\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|;|$)', re.IGNORECASE | re.DOTALL)
+_PREDICATE_RE = re.compile(
+    r'([A-Za-z_]\w*)\s*(=|==|<>|!=|<=|>=|<|>|\bNOT\s+BETWEEN\b|\bBETWEEN\b|\bNOT\s+IN\b|\bIN\b'
+    r'|\bNOT\s+LIKE\b|\bLIKE\b|\bIS\s+NOT\b|\bIS\b)',
+    re.IGNORECASE,
+)
+_EQUALITY_OPERATORS = {'=', '==', 'IN', 'IS'}
+_SQL_KEYWORDS = {'AND', 'OR', 'NOT', 'NULL', 'WHERE', 'BETWEEN', 'IN', 'LIKE', 'IS'}
+
+
+@dataclass(frozen=True)
+class IndexCandidate:
+    """
+    A candidate index on one or more columns of a table, with its estimated benefit.
+    """
+    table: str
+    columns: tuple
+    benefit: float = 0.0
+
+    @property
+    def name(self) -> str:
+        suffix = '_'.join(re.sub(r'_enc$', '', column, flags=re.IGNORECASE).lower() for column in self.columns)
+        return f"idx_{self.table.lower()}_{suffix}"
+
+    @property
+    def create_sql(self) -> str:
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table} ({', '.join(self.columns)})"
+
+    @property
+    def drop_sql(self) -> str:
+        return f"DROP INDEX IF EXISTS {self.name}"
+
+
+def parse_query(query: str):
+    """
+    Extracts the table and the filtered columns of a single-table query template.
+
+    Parameters:
+        query (str): SQL query template.
+
+    Returns:
+        Tuple[str, List[Tuple[str, bool]]]: The table name and the predicate columns in order
+        of appearance, each flagged True for equality predicates and False for ranges.
+
+    Raises:
+        ValueError: If the query has no FROM clause.
+    """
+    from_match = _FROM_RE.search(query)
+    if from_match is None:
+        raise ValueError(f"Cannot find a FROM clause in query: {query}")
+    table = from_match.group(1)
+
+    predicates = []
+    where_match = _WHERE_RE.search(query)
+    if where_match is not None:
+        seen = set()
+        for column, operator in _PREDICATE_RE.findall(where_match.group(1)):
+            if column.upper() in _SQL_KEYWORDS or column in seen:
+                continue
+            seen.add(column)
+            predicates.append((column, ' '.join(operator.upper().split()) in _EQUALITY_OPERATORS))
+    return table, predicates
+
+
+def load_workload(path):
+    """
+    Loads query templates from a JSON workload file.
+
+    The file holds a list of objects with a ``query`` template, its ``param_ranges`` and an
+    optional relative ``weight`` (execution frequency).
+
+    Returns:
+        List[Tuple[str, list, float]]: (query, param_ranges, weight) triples.
+    """
+    with open(path, mode='r') as file:
+        entries = json.load(file)
+    return [(entry['query'], [tuple(r) for r in entry.get('param_ranges', [])], float(entry.get('weight', 1.0)))
+            for entry in entries]
+
+
+class WorkloadAnalyzer:
+    """
+    Derives candidate indexes from a query workload.
+
+    Single-column candidates are enumerated for every filtered column and composite
+    candidates for every ordering of columns filtered together by the same query, with
+    equality columns placed before range columns. Each candidate is scored by the weighted
+    number of queries whose predicates it can seek on, with extra credit for further
+    matched key columns and a per-column maintenance penalty, and the workload is pruned to
+    the most beneficial candidates.
+    """
+
+    def __init__(self, queries, max_candidates=8, max_width=2, maintenance_cost=0.25):
+        self.queries = []
+        for entry in queries:
+            query, param_ranges = entry[0], entry[1]
+            weight = entry[2] if len(entry) > 2 else 1.0
+            self.queries.append((query, param_ranges, weight))
+        self.max_candidates = max_candidates
+        self.max_width = max_width
+        self.maintenance_cost = maintenance_cost
+        self._parsed = [(parse_query(query), weight) for query, _, weight in self.queries]
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        return cls(load_workload(path), **kwargs)
+
+    def enumerate_candidates(self):
+        """
+        Lists every single-column and composite index the workload could use, unscored.
+        """
+        keys = set()
+        for (table, predicates), _ in self._parsed:
+            equality = [column for column, is_equality in predicates if is_equality]
+            ranges = [column for column, is_equality in predicates if not is_equality]
+            for width in range(1, min(self.max_width, len(predicates)) + 1):
+                for columns in permutations(equality + ranges, width):
+                    # A range column stops the index seek, so equality columns go first.
+                    if any(columns[i] in ranges and columns[i + 1] in equality for i in range(width - 1)):
+                        continue
+                    keys.add((table, columns))
+        return [IndexCandidate(table, columns) for table, columns in sorted(keys)]
+
+    def estimate_benefit(self, candidate):
+        """
+        Scores a candidate against the workload; higher is better.
+        """
+        benefit = 0.0
+        for (table, predicates), weight in self._parsed:
+            if table != candidate.table:
+                continue
+            predicate_kinds = dict(predicates)
+            if candidate.columns[0] not in predicate_kinds:
+                continue
+            score = 1.0
+            seeking = predicate_kinds[candidate.columns[0]]
+            for column in candidate.columns[1:]:
+                if column not in predicate_kinds:
+                    break
+                # Columns after a range are only usable for filtering within the index.
+                score += 1.0 if seeking else 0.5
+                seeking = seeking and predicate_kinds[column]
+            benefit += weight * score
+        return benefit - self.maintenance_cost * len(candidate.columns)
+
+    def _uses(self, parsed_query, candidate):
+        (table, predicates), _ = parsed_query
+        return table == candidate.table and candidate.columns[0] in dict(predicates)
+
+    def candidates(self):
+        """
+        Returns the pruned candidate set, most beneficial first.
+
+        Composites of columns that are only ever range-filtered keep a single ordering, led
+        by the column the rest of the workload benefits from most. Before the set is cut to
+        ``max_candidates``, every query template first receives its best usable candidate,
+        so no template is left without an index to seek on.
+        """
+        scored = [IndexCandidate(c.table, c.columns, self.estimate_benefit(c)) for c in self.enumerate_candidates()]
+        single_benefit = {(c.table, c.columns[0]): c.benefit for c in scored if len(c.columns) == 1}
+        equality_columns = {(table, column) for (table, predicates), _ in self._parsed
+                            for column, is_equality in predicates if is_equality}
+
+        def rank(c):
+            return (-c.benefit, -single_benefit.get((c.table, c.columns[0]), 0.0), c.name)
+
+        pruned, range_orderings = [], {}
+        for c in sorted(scored, key=rank):
+            if c.benefit <= 0:
+                continue
+            if len(c.columns) > 1:
+                if c.benefit <= single_benefit.get((c.table, c.columns[0]), 0.0):
+                    continue
+                if not any((c.table, column) in equality_columns for column in c.columns):
+                    # Range-only composites differ by ordering alone; keep the best-ranked one.
+                    key = (c.table, frozenset(c.columns))
+                    if key in range_orderings:
+                        continue
+                    range_orderings[key] = c
+            pruned.append(c)
+
+        selected = []
+        for parsed_query in self._parsed:
+            if len(selected) >= self.max_candidates:
+                break
+            if any(self._uses(parsed_query, c) for c in selected):
+                continue
+            usable = [c for c in pruned if self._uses(parsed_query, c)]
+            if usable:
+                selected.append(usable[0])
+        selected += [c for c in pruned if c not in selected][:self.max_candidates - len(selected)]
+        selected.sort(key=rank)
+        logger.info(f"Selected {len(selected)} of {len(scored)} candidate indexes: {[c.name for c in selected]}")
+        return selected
@@ -0,0 +1,171 @@
+import logging
+import sqlite3
+import time
+
+import numpy as np
+
+from Scripts.housing_schema import COLUMNS, SAMPLE_DATA, encrypt_rows, insert_sql
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class WorkloadEngine:
+    """
+    Mixed read/write workload that interleaves encrypted inserts and updates with the
+    aggregate queries of DatabaseIndexEnv.
+
+    Every step draws a Poisson number of operations (``arrival_rate`` operations per second
+    over a ``step_duration`` window) and assigns each one a type according to the read,
+    insert and update ratios. Reads cycle through the query templates; inserts and updates
+    write rows encrypted with the bulk encryptor shared with generate_data, so the time SQLite
+    spends maintaining indexes over the ciphertext BLOBs is charged to the agent.
+    """
+
+    def __init__(self, he_instance, read_ratio=0.8, insert_ratio=0.15, update_ratio=0.05,
+                 arrival_rate=50.0, step_duration=1.0, realtime=False, row_factory=None,
+                 write_weight=1.0, storage_weight=0.001, table='housing_encrypted', seed=None):
+        ratios = np.array([read_ratio, insert_ratio, update_ratio], dtype=np.float64)
+        if (ratios < 0).any() or ratios.sum() <= 0:
+            raise ValueError("Workload ratios must be non-negative and not all zero.")
+        if arrival_rate <= 0:
+            raise ValueError("arrival_rate must be positive.")
+
+        self.he_instance = he_instance
+        self.op_probabilities = ratios / ratios.sum()
+        self.arrival_rate = arrival_rate
+        self.step_duration = step_duration
+        self.realtime = realtime
+        self.row_factory = row_factory or self._sample_row
+        self.write_weight = write_weight
+        self.storage_weight = storage_weight
+        self.table = table
+        self.insert_sql = insert_sql(table)
+        self.rng = np.random.default_rng(seed)
+        self._dbstat_available = True
+
+    def _sample_row(self):
+        """
+        Perturbs one of the sample rows so that inserted values spread over the index.
+        """
+        base = np.array(SAMPLE_DATA[self.rng.integers(len(SAMPLE_DATA))], dtype=np.float64)
+        return tuple(base * self.rng.normal(1.0, 0.05, size=base.shape))
+
+    def schedule(self):
+        """
+        Draws the operation types for one step.
+
+        Returns:
+            List[str]: Sequence of 'read', 'insert' and 'update' operations in arrival order.
+        """
+        n_ops = max(1, self.rng.poisson(self.arrival_rate * self.step_duration))
+        return list(self.rng.choice(['read', 'insert', 'update'], size=n_ops, p=self.op_probabilities))
+
+    def run(self, conn, queries, execute_query):
+        """
+        Executes one step of the mixed workload.
+
+        Rows for the scheduled inserts and updates are encrypted up front, outside the timed
+        sections, so write latency measures the database work only. Any query template that
+        received no read in the schedule is executed once at the end so every template has
+        a measurement.
+
+        Parameters:
+            conn (sqlite3.Connection): Connection the writes are executed on.
+            queries (list): Query templates and parameter ranges, as in DatabaseIndexEnv.queries.
+            execute_query (callable): Runs one query template, returning (execution_time, params).
+
+        Returns:
+            dict: Per-template query times and parameters plus the individual write times.
+        """
+        ops = self.schedule()
+        n_inserts = ops.count('insert')
+        n_updates = ops.count('update')
+        inserts = iter(encrypt_rows(self.he_instance, [self.row_factory() for _ in range(n_inserts)]))
+        updates = iter(self._prepare_updates(conn, n_updates))
+
+        read_times = [[] for _ in queries]
+        query_params = [None] * len(queries)
+        write_times = []
+        next_query = 0
+        cursor = conn.cursor()
+
+        for op in ops:
+            if self.realtime:
+                time.sleep(self.rng.exponential(1.0 / self.arrival_rate))
+            if op == 'read':
+                query, param_ranges = queries[next_query]
+                execution_time, params = execute_query(query, param_ranges)
+                read_times[next_query].append(execution_time)
+                query_params[next_query] = params
+                next_query = (next_query + 1) % len(queries)
+                continue
+
+            start_time = time.perf_counter()
+            if op == 'insert':
+                cursor.execute(self.insert_sql, next(inserts))
+            else:
+                sql, params = next(updates)
+                cursor.execute(sql, params)
+            conn.commit()
+            write_times.append(time.perf_counter() - start_time)
+
+        for query_id, times in enumerate(read_times):
+            if not times:
+                query, param_ranges = queries[query_id]
+                execution_time, params = execute_query(query, param_ranges)
+                times.append(execution_time)
+                query_params[query_id] = params
+
+        logger.info(f"Workload step ran {len(ops)} operations ({n_inserts} inserts, {n_updates} updates).")
+        return {
+            'query_times': [float(np.mean(times)) for times in read_times],
+            'query_params': query_params,
+            'write_times': write_times,
+            'n_inserts': n_inserts,
+            'n_updates': n_updates,
+        }
+
+    def _prepare_updates(self, conn, n_updates):
+        """
+        Picks random existing rows and re-encrypts one column of each.
+        """
+        if not n_updates:
+            return []
+        max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {self.table}").fetchone()[0]
+        if max_rowid is None:
+            logger.warning("Workload update skipped: table is empty.")
+            return []
+
+        updates = []
+        for _ in range(n_updates):
+            column_id = self.rng.integers(len(COLUMNS))
+            value = self.row_factory()[column_id]
+            ciphertext = encrypt_rows(self.he_instance, [(value,)])[0][0]
+            rowid = int(self.rng.integers(1, max_rowid + 1))
+            updates.append((f"UPDATE {self.table} SET {COLUMNS[column_id]} = ? WHERE rowid = ?", (ciphertext, rowid)))
+        return updates
+
+    def index_storage_bytes(self, conn, index_names):
+        """
+        Returns the on-disk size of the given indexes, using the dbstat virtual table.
+        """
+        index_names = [name for name in index_names if name]
+        if not index_names or not self._dbstat_available:
+            return 0
+        placeholders = ', '.join('?' for _ in index_names)
+        try:
+            size = conn.execute(f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({placeholders})", index_names).fetchone()[0]
+        except sqlite3.OperationalError as e:
+            logger.warning(f"dbstat is unavailable, index storage will not be charged: {e}")
+            self._dbstat_available = False
+            return 0
+        return size or 0
+
+    def reward(self, avg_query_time, avg_write_time, index_bytes):
+        """
+        Combines read latency, write latency and index storage (in MiB) into a reward.
+        """
+        return -(avg_query_time + self.write_weight * avg_write_time
+                 + self.storage_weight * index_bytes / 2 ** 20)
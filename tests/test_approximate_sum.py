@@ -0,0 +1,72 @@
+import sqlite3
+import pytest
+import numpy as np
+from Pyfhel import Pyfhel
+from Scripts import homomorphic_sum
+from Scripts.ciphertext_codec import load_ciphertext
+from Scripts.homomorphic_sum import HomomorphicApproxSumAggregate
+from Scripts.sampling import (approximate_interval, approximate_query, build_sample_table,
+                              decrypt_approximate_sum, unpack_bundle)
+
+@pytest.fixture(scope='module')
+def he():
+    """Fixture to initialize Pyfhel for use in tests."""
+    he_instance = Pyfhel()
+    qi_sizes = [60, 30, 30, 30, 30, 30, 60]
+    he_instance.contextGen(scheme='CKKS', n=2**14, scale=2**30, qi_sizes=qi_sizes)
+    he_instance.keyGen()
+    return he_instance
+
+@pytest.fixture
+def conn(he, monkeypatch):
+    monkeypatch.setattr(homomorphic_sum, 'shared_pyfhel', lambda *paths: he)
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE housing_encrypted (MedInc_enc BLOB, MedInc REAL)')
+    conn.executemany('INSERT INTO housing_encrypted VALUES (?, ?)', [
+        (he.encryptPtxt(he.encodeFrac(np.array([float(i)], dtype=np.float64))).to_bytes(), float(i))
+        for i in range(1, 41)
+    ])
+    conn.create_aggregate('homomorphic_sum_approx', 4, HomomorphicApproxSumAggregate)
+    yield conn
+    conn.close()
+
+def _expected(conn, fraction, threshold):
+    rows = conn.execute('SELECT stratum, stratum_population, MedInc FROM housing_encrypted_sample '
+                        'WHERE MedInc > ? AND sample_u < ?', (threshold, fraction)).fetchall()
+    strata = {}
+    for stratum, population, value in rows:
+        entry = strata.setdefault(stratum, {'stratum': stratum, 'n': 0, 'population': population,
+                                            'fraction': fraction, 'sum': 0.0, 'sum_sq': 0.0})
+        entry['n'] += 1
+        entry['sum'] += value
+        entry['sum_sq'] += value ** 2
+    return strata
+
+@pytest.mark.parametrize('method', ['bernoulli', 'stratified'])
+def test_encrypted_approximate_sum_round_trip(conn, he, method):
+    build_sample_table(conn, fraction=0.6, method=method, n_strata=4, seed=1)
+    sql, before, after = approximate_query(
+        "SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted WHERE MedInc > ?", 0.5)
+    bundle = conn.execute(sql, before + [10.0] + after).fetchone()[0]
+
+    expected_strata = _expected(conn, 0.5, 10.0)
+    strata = unpack_bundle(bundle)
+    assert {s['stratum']: s['n'] for s in strata} == {h: s['n'] for h, s in expected_strata.items()}
+
+    # Both the encrypted sum and the squared-ciphertext sum_sq must decrypt to the plaintext moments.
+    for stratum in strata:
+        expected = expected_strata[stratum['stratum']]
+        total = he.decryptFrac(load_ciphertext(he, stratum['sum']))[0]
+        total_sq = he.decryptFrac(load_ciphertext(he, stratum['sum_sq']))[0]
+        np.testing.assert_allclose([total, total_sq], [expected['sum'], expected['sum_sq']], rtol=1e-3)
+
+    estimate, low, high = decrypt_approximate_sum(he, bundle)
+    expected_estimate, expected_low, expected_high = approximate_interval(list(expected_strata.values()))
+    np.testing.assert_allclose([estimate, low, high], [expected_estimate, expected_low, expected_high], rtol=1e-3)
+    assert low < estimate < high
+
+def test_encrypted_approximate_sum_without_rows(conn):
+    build_sample_table(conn, fraction=0.5, seed=0)
+    sql, before, after = approximate_query(
+        "SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted WHERE MedInc > ?", 0.5)
+    assert conn.execute(sql, before + [1000.0] + after).fetchone()[0] is None
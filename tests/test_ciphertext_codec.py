@@ -0,0 +1,91 @@
+import sqlite3
+import pytest
+import numpy as np
+from Pyfhel import Pyfhel, PyCtxt
+from Scripts import ciphertext_codec
+from Scripts.ciphertext_codec import (CiphertextCodec, benchmark_load, convert_table, is_compact, load_ciphertext,
+                                      load_templates)
+from Scripts.encryption import HE
+from Scripts.homomorphic_sum import homomorphic_sum_py
+
+@pytest.fixture(scope='module')
+def he():
+    """Fixture to initialize Pyfhel for use in tests."""
+    he_instance = Pyfhel()
+    qi_sizes = [60, 30, 30, 30, 30, 30, 60]
+    he_instance.contextGen(scheme='CKKS', n=2**14, scale=2**30, qi_sizes=qi_sizes)
+    he_instance.keyGen()
+    return he_instance
+
+@pytest.fixture(scope='module')
+def codec(he):
+    return CiphertextCodec(he)
+
+def _encrypt(he, value):
+    return he.encryptPtxt(he.encodeFrac(np.array([value], dtype=np.float64)))
+
+def test_compact_round_trip(he, codec):
+    ctxt = _encrypt(he, 3.5)
+    compact = codec.encode(ctxt)
+    assert is_compact(compact)
+    assert len(compact) < len(ctxt.to_bytes())
+    restored = load_ciphertext(he, compact)
+    np.testing.assert_almost_equal(he.decryptFrac(restored)[0], 3.5, decimal=1)
+
+def test_encode_accepts_regular_bytes(he, codec):
+    compact = codec.encode(_encrypt(he, 1.25).to_bytes())
+    np.testing.assert_almost_equal(he.decryptFrac(load_ciphertext(he, compact))[0], 1.25, decimal=1)
+    assert codec.encode(compact) == compact
+
+def test_load_into_preallocated_ciphertext(he, codec):
+    target = PyCtxt(pyfhel=he)
+    assert load_ciphertext(he, codec.encode(_encrypt(he, 2.0)), target) is target
+
+def test_sum_over_mixed_formats(he, codec):
+    ciphertexts = [codec.encode(_encrypt(he, 1.0)), _encrypt(he, 2.0).to_bytes(), codec.encode(_encrypt(he, 3.0))]
+    result = homomorphic_sum_py(he, *ciphertexts)
+    np.testing.assert_almost_equal(he.decryptFrac(PyCtxt(pyfhel=he, bytestring=result))[0], 6.0, decimal=1)
+
+def test_convert_table_and_reload_templates(he, codec):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE housing_encrypted (MedInc_enc BLOB, HouseAge_enc BLOB)')
+    conn.executemany('INSERT INTO housing_encrypted VALUES (?, ?)',
+                     [(_encrypt(he, i).to_bytes(), None) for i in range(1, 4)])
+    stats = convert_table(conn, codec, 'housing_encrypted', ['MedInc_enc', 'HouseAge_enc'])
+    assert stats['converted'] == 3
+    assert stats['bytes_after'] < stats['bytes_before']
+
+    ciphertext_codec._TEMPLATES.clear()
+    assert load_templates(conn) >= 1
+    values = [row[0] for row in conn.execute('SELECT MedInc_enc FROM housing_encrypted')]
+    assert all(is_compact(value) for value in values)
+    decrypted = [he.decryptFrac(load_ciphertext(he, value))[0] for value in values]
+    np.testing.assert_almost_equal(decrypted, [1.0, 2.0, 3.0], decimal=1)
+    conn.close()
+
+def test_unknown_template_is_rejected(he, codec):
+    compact = codec.encode(_encrypt(he, 1.0))
+    ciphertext_codec._TEMPLATES.clear()
+    with pytest.raises(ValueError):
+        load_ciphertext(he, compact)
+
+def test_benchmark_load_reports_every_format(he):
+    results = benchmark_load(he, n_ciphertexts=3)
+    assert set(results) == {'regular', 'uncompressed', 'compact'}
+    assert results['compact']['bytes'] < results['uncompressed']['bytes']
+    assert all(result['load_ms'] > 0 for result in results.values())
+
+def test_compact_encryption_persists_templates(he):
+    handler = HE()
+    handler.he = he
+    conn = sqlite3.connect(':memory:')
+    handler.enable_compact_serialization(conn)
+    conn.execute('CREATE TABLE housing_encrypted (MedInc_enc BLOB)')
+    conn.executemany('INSERT INTO housing_encrypted VALUES (?)', [(handler.encrypt_value(v),) for v in (1.5, 2.5)])
+
+    ciphertext_codec._TEMPLATES.clear()
+    assert load_templates(conn) >= 1
+    values = [row[0] for row in conn.execute('SELECT MedInc_enc FROM housing_encrypted')]
+    assert all(is_compact(value) for value in values)
+    np.testing.assert_almost_equal([he.decryptFrac(load_ciphertext(he, value))[0] for value in values], [1.5, 2.5], decimal=1)
+    conn.close()
@@ -0,0 +1,51 @@
+import csv
+import json
+import sqlite3
+import pytest
+from Scripts.housing_schema import COLUMNS, INSERT_SQL
+from Scripts.sampling import build_sample_table
+from rl_agent.DatabaseIndexEnv import DatabaseIndexEnv
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / 'housing.db'
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE housing_encrypted ({', '.join(f'{column} BLOB' for column in COLUMNS)})")
+    conn.executemany(INSERT_SQL, [tuple(b'ct' for _ in COLUMNS)] * 50)
+    conn.commit()
+    build_sample_table(conn, fraction=0.5, seed=0)
+    conn.close()
+    return str(path)
+
+def test_approximate_env_indexes_sample_with_exact_candidates(db_path):
+    exact = DatabaseIndexEnv(db_path)
+    approximate = DatabaseIndexEnv(db_path, approximate_fraction=0.1)
+    assert [c.columns for c in approximate.candidates] == [c.columns for c in exact.candidates]
+    assert all(c.table == 'housing_encrypted_sample' for c in approximate.candidates)
+    assert not any('sample_u' in c.columns for c in approximate.candidates)
+
+    approximate._set_index(1)
+    indexes = {row[0] for row in approximate.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert indexes == {'idx_housing_encrypted_sample_u', approximate.candidates[0].name}
+    exact.close()
+    approximate.close()
+
+def test_approximate_env_rejects_write_workload(db_path):
+    with pytest.raises(ValueError):
+        DatabaseIndexEnv(db_path, workload=object(), approximate_fraction=0.1)
+
+def test_episode_log_numbering_survives_truncation(db_path, tmp_path):
+    workload_file = tmp_path / 'workload.json'
+    workload_file.write_text(json.dumps([
+        {"query": "SELECT COUNT(*) FROM housing_encrypted WHERE MedInc_enc > ?", "param_ranges": [[0, 1]]},
+    ]))
+    env = DatabaseIndexEnv(db_path, workload_file=workload_file, episode_log_limit=2)
+    for _ in range(3):
+        env.reset()
+        env.step(0)
+    log_path = tmp_path / 'episode_logs.csv'
+    env.save_episode_logs(log_path)
+    with open(log_path, newline='') as file:
+        rows = list(csv.reader(file))
+    assert [row[0] for row in rows] == ['Episode', '2', '3']
+    env.close()
@@ -0,0 +1,72 @@
+import random
+import sqlite3
+import struct
+import time
+import numpy as np
+from Scripts import generate_data
+from Scripts.generate_data import populate_encrypted_db
+from Scripts.housing_schema import COLUMNS
+from Scripts.synthetic_data import CaliforniaHousingGenerator
+
+class FakeHE:
+    """Stands in for the HE handler: 'ciphertexts' are packed doubles, finished in scrambled order."""
+
+    def encrypt_value(self, value):
+        if random.random() < 0.01:
+            time.sleep(0.001)
+        return struct.pack('<d', value)
+
+def _column(db_path, column):
+    conn = sqlite3.connect(db_path)
+    values = [struct.unpack('<d', row[0])[0] for row in conn.execute(f'SELECT {column} FROM housing_encrypted ORDER BY rowid')]
+    conn.close()
+    return values
+
+def test_populate_inserts_generated_rows_in_order(tmp_path):
+    db_path = str(tmp_path / 'housing.db')
+    stats = populate_encrypted_db(db_path, n_rows=1000, chunk_size=64, seed=3, workers=4, he_instance=FakeHE())
+    assert stats['rows'] == 1000
+    assert stats['rows_per_sec'] > 0
+    expected = CaliforniaHousingGenerator(3).generate(1000)
+    np.testing.assert_array_equal(_column(db_path, COLUMNS[0]), expected[:, 0])
+    np.testing.assert_array_equal(_column(db_path, COLUMNS[-1]), expected[:, -1])
+
+def test_populate_bounds_chunks_in_flight(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'housing.db')
+    chunk_size, max_in_flight = 50, 3
+    lags = []
+
+    class RecordingGenerator(CaliforniaHousingGenerator):
+        def iter_chunks(self, n_rows, chunk_size=10000):
+            reader = sqlite3.connect(db_path)
+            for produced, chunk in enumerate(super().iter_chunks(n_rows, chunk_size)):
+                inserted = reader.execute('SELECT COUNT(*) FROM housing_encrypted').fetchone()[0]
+                lags.append(produced - inserted // chunk_size)
+                yield chunk
+            reader.close()
+
+    monkeypatch.setattr(generate_data, 'CaliforniaHousingGenerator', RecordingGenerator)
+    populate_encrypted_db(db_path, n_rows=1000, chunk_size=chunk_size, seed=0, workers=2,
+                          max_in_flight=max_in_flight, he_instance=FakeHE())
+    assert len(lags) == 1000 // chunk_size
+    # Before a chunk is generated, at most max_in_flight - 1 earlier chunks await insertion.
+    assert max(lags) <= max_in_flight - 1
+
+def test_populate_samples_after_ingestion(tmp_path):
+    db_path = str(tmp_path / 'housing.db')
+    populate_encrypted_db(db_path, n_rows=2000, chunk_size=250, seed=1, sample_fraction=0.1,
+                          sample_method='stratified', he_instance=FakeHE())
+    conn = sqlite3.connect(db_path)
+    populations = {row[0] for row in conn.execute('SELECT DISTINCT stratum_population FROM housing_encrypted_sample')}
+    n_sampled = conn.execute('SELECT COUNT(*) FROM housing_encrypted_sample').fetchone()[0]
+    conn.close()
+    assert populations == {200}
+    assert n_sampled == 200
+
+def test_populate_loads_real_dataset(tmp_path):
+    data_path = tmp_path / 'cal_housing.data'
+    data_path.write_text('-122.23,37.88,41,880,129,322,126,8.3252,452600\n' * 30)
+    db_path = str(tmp_path / 'housing.db')
+    stats = populate_encrypted_db(db_path, n_rows=25, chunk_size=10, data_path=data_path, he_instance=FakeHE())
+    assert stats['rows'] == 25
+    assert _column(db_path, 'MedHouseVal_enc') == [452600.0] * 25
@@ -0,0 +1,57 @@
+import sqlite3
+import pytest
+import numpy as np
+from Pyfhel import Pyfhel, PyCtxt
+from Scripts.homomorphic_sum import benchmark_streaming, homomorphic_sum_streaming
+
+@pytest.fixture(scope='module')
+def he():
+    """Fixture to initialize Pyfhel for use in tests."""
+    he_instance = Pyfhel()
+    qi_sizes = [60, 30, 30, 30, 30, 30, 60]
+    he_instance.contextGen(scheme='CKKS', n=2**14, scale=2**30, qi_sizes=qi_sizes)
+    he_instance.keyGen()
+    return he_instance
+
+@pytest.fixture(scope='module')
+def conn(he):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE housing_encrypted (MedInc_enc BLOB, MedInc REAL)')
+    data = []
+    for i in range(1, 6):
+        ptxt = he.encodeFrac(np.array([float(i)], dtype=np.float64))
+        data.append((he.encryptPtxt(ptxt).to_bytes(), float(i)))
+    data.append((None, None))
+    conn.executemany('INSERT INTO housing_encrypted (MedInc_enc, MedInc) VALUES (?, ?)', data)
+    conn.commit()
+    yield conn
+    conn.close()
+
+def _decrypt(he, ciphertext_bytes):
+    return he.decryptFrac(PyCtxt(pyfhel=he, bytestring=ciphertext_bytes))[0]
+
+def test_streaming_sum_matches_plaintext(conn, he):
+    result = homomorphic_sum_streaming(conn, he, 'housing_encrypted', 'MedInc_enc')
+    np.testing.assert_almost_equal(_decrypt(he, result), 15.0, decimal=1)
+
+def test_streaming_sum_with_filter(conn, he):
+    result = homomorphic_sum_streaming(conn, he, 'housing_encrypted', 'MedInc_enc',
+                                       where='MedInc > ?', params=(2,))
+    np.testing.assert_almost_equal(_decrypt(he, result), 12.0, decimal=1)
+
+def test_streaming_sum_no_rows(conn, he):
+    result = homomorphic_sum_streaming(conn, he, 'housing_encrypted', 'MedInc_enc',
+                                       where='MedInc > ?', params=(100,))
+    assert result is None
+
+def test_streaming_sum_rejects_bad_identifier(conn, he):
+    with pytest.raises(ValueError):
+        homomorphic_sum_streaming(conn, he, 'housing_encrypted; DROP TABLE x', 'MedInc_enc')
+
+def test_benchmark_streaming_compares_with_aggregate(conn, he):
+    results = benchmark_streaming(conn, he, 'housing_encrypted', 'MedInc_enc')
+    assert results['rows'] == 5
+    for path in ('aggregate', 'streaming'):
+        assert results[path]['ms_per_row'] > 0
+        # Either path holds about one ciphertext at a time, not the whole column.
+        assert results[path]['peak_bytes'] < 3 * len(conn.execute('SELECT MedInc_enc FROM housing_encrypted').fetchone()[0])
@@ -0,0 +1,110 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+from stable_baselines3 import PPO
+from rl_agent.IndexRecommender import IndexRecommender, benchmark_recommender
+
+QUERIES = [
+    ("SELECT SUM(MedInc) FROM housing WHERE HouseAge > ?", [(10, 50)]),
+    ("SELECT SUM(Population) FROM housing WHERE Longitude > ? AND Latitude < ?", [(-120, -115), (32, 40)]),
+]
+
+class FakeIndexEnv(gym.Env):
+    def __init__(self, n_actions):
+        self.action_space = spaces.Discrete(n_actions)
+        self.observation_space = spaces.Box(low=0, high=np.inf, shape=(1,), dtype=np.float32)
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        return np.array([0], dtype=np.float32), {}
+
+    def step(self, action):
+        return np.array([0.1], dtype=np.float32), -0.1, True, False, {}
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.execute('CREATE TABLE housing (MedInc REAL, HouseAge REAL, Population REAL, Longitude REAL, Latitude REAL)')
+    conn.executemany('INSERT INTO housing VALUES (?, ?, ?, ?, ?)',
+                     [(8.3, 41, 880, -122.2, 37.9), (5.6, 52, 1200, -118.3, 34.1)])
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def recommender_factory(tmp_path, conn):
+    created = []
+
+    def factory(**kwargs):
+        from rl_agent.WorkloadAnalyzer import WorkloadAnalyzer
+        n_actions = len(WorkloadAnalyzer(QUERIES).candidates()) + 1
+        model_path = tmp_path / "ppo_index_optimizer"
+        PPO("MlpPolicy", FakeIndexEnv(n_actions), n_steps=8, batch_size=8, device='cpu').save(model_path)
+        kwargs.setdefault('conn', conn)
+        recommender = IndexRecommender(model_path, queries=QUERIES, **kwargs)
+        created.append(recommender)
+        return recommender
+
+    yield factory
+    for recommender in created:
+        recommender.close()
+
+def test_batched_predictions_match_single_forward_pass(recommender_factory):
+    recommender = recommender_factory()
+    observations = np.linspace(0, 1, 32)
+    futures = [recommender.submit(observation) for observation in observations]
+    batched = [future.result(timeout=5) for future in futures]
+    expected = recommender.predict(observations.reshape(-1, 1).astype(np.float32))
+    assert batched == list(expected)
+
+def test_rejects_mismatched_candidates(recommender_factory, tmp_path):
+    recommender_factory()
+    with pytest.raises(ValueError):
+        IndexRecommender(tmp_path / "ppo_index_optimizer", queries=QUERIES[:1])
+
+def test_observe_measures_live_queries(recommender_factory):
+    recommender = recommender_factory(observation_ttl=3600)
+    first = recommender.observe()
+    assert first >= 0
+    assert recommender.observe() == first
+
+def test_apply_respects_dry_run_and_cooldown(recommender_factory, conn):
+    recommender = recommender_factory(dry_run=False, cooldown=3600)
+    index = recommender.candidates[0].name
+    applied, reason = recommender._apply(1, index)
+    assert applied and reason == 'applied'
+    names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert names == [index]
+    assert recommender._apply(2, recommender.candidates[1].name) == (False, 'cooldown')
+    assert recommender._apply(1, index) == (False, 'already active')
+
+def test_dry_run_leaves_database_untouched(recommender_factory, conn, monkeypatch):
+    recommender = recommender_factory(dry_run=True, cooldown=0)
+    # Force an index action: with action 0 _apply would return before the dry-run branch.
+    monkeypatch.setattr(recommender, 'predict', lambda observations: np.ones(len(observations), dtype=np.int64))
+    recommendation = recommender.recommend(0.5)
+    assert recommendation.action == 1
+    assert recommendation.index == recommender.candidates[0].name
+    assert (recommendation.applied, recommendation.reason) == (False, 'dry run')
+    assert recommender.active_index == recommendation.index
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'").fetchone()[0] == 0
+
+def test_opens_connection_usable_from_client_threads(recommender_factory, tmp_path):
+    db_path = tmp_path / "housing.db"
+    with sqlite3.connect(db_path) as setup:
+        setup.execute('CREATE TABLE housing (MedInc REAL, HouseAge REAL, Population REAL, Longitude REAL, Latitude REAL)')
+        setup.execute('INSERT INTO housing VALUES (8.3, 41, 880, -122.2, 37.9)')
+    setup.close()
+    recommender = recommender_factory(conn=None, db_path=str(db_path), dry_run=False, cooldown=0, observation_ttl=0)
+    # Live observations and index changes run on the calling threads, not the one that opened the connection.
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        recommendations = list(executor.map(lambda _: recommender.recommend(), range(8)))
+    assert all(recommendation.observation >= 0 for recommendation in recommendations)
+    assert recommender.conn.execute("SELECT 1 FROM pragma_function_list WHERE name = 'homomorphic_sum'").fetchone()
+
+def test_benchmark_reports_throughput(recommender_factory):
+    results = benchmark_recommender(recommender_factory(), n_requests=200, concurrency=4)
+    assert results['requests_per_sec'] > 0
+    assert results['p99_ms'] >= results['p50_ms']
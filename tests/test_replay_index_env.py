@@ -0,0 +1,137 @@
+import pytest
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+from rl_agent.TransitionRecorder import TransitionRecorder, load_transitions
+from rl_agent.ReplayIndexEnv import ReplayIndexEnv
+
+class FakeIndexEnv(gym.Env):
+    """Stand-in for DatabaseIndexEnv whose query time is a known function of the action and params."""
+
+    queries = [
+        ("SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted WHERE HouseAge_enc > ?", [(10, 50)]),
+        ("SELECT homomorphic_sum(AveOccup_enc) FROM housing_encrypted WHERE Longitude_enc > ? AND Latitude_enc < ?", [(-120, -115), (32, 40)]),
+    ]
+
+    def __init__(self):
+        self.action_space = spaces.Discrete(3)
+        self.observation_space = spaces.Box(low=0, high=np.inf, shape=(1,), dtype=np.float32)
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        return np.array([0], dtype=np.float32), {}
+
+    def step(self, action):
+        query_params = [[float(self.np_random.uniform(low, high)) for low, high in ranges] for _, ranges in self.queries]
+        query_times = [(action + 1) * 0.01 + 0.001 * params[0] for params in query_params]
+        avg_query_time = float(np.mean(query_times))
+        info = {
+            'avg_query_time': avg_query_time,
+            'query_times': query_times,
+            'query_params': query_params,
+            'index': f'idx_{action}',
+        }
+        return np.array([avg_query_time], dtype=np.float32), -avg_query_time, True, False, info
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "transitions.jsonl"
+    env = TransitionRecorder(FakeIndexEnv(), path=path, flush_every=7)
+    env.reset(seed=0)
+    for i in range(60):
+        env.step(i % 3)
+        env.reset()
+    env.close()
+    return path
+
+def test_recorder_writes_every_transition(dataset):
+    records = list(load_transitions(dataset))
+    assert len(records) == 60
+    assert records[0]['action'] == 0
+    assert records[1]['index'] == 'idx_1'
+    assert records[-1]['episode'] == 59
+    assert len(records[0]['info']['query_times']) == 2
+
+def test_recorder_appends_to_existing_dataset(dataset):
+    env = TransitionRecorder(FakeIndexEnv(), path=dataset)
+    env.reset(seed=1)
+    env.step(0)
+    env.close()
+    assert len(list(load_transitions(dataset))) == 61
+
+def test_replay_serves_interpolated_measurements(dataset):
+    env = ReplayIndexEnv(dataset, queries=FakeIndexEnv.queries)
+    assert env.action_space.n == 3
+    env.reset(seed=0)
+    _, reward, terminated, _, info = env.step(2)
+    assert terminated
+    assert info['index'] == 'idx_2'
+    # The 1-D query is linear in its parameter, so interpolation should be close to exact.
+    expected = 0.03 + 0.001 * info['query_params'][0][0]
+    assert info['query_times'][0] == pytest.approx(expected, abs=1e-3)
+    assert reward == pytest.approx(-np.mean(info['query_times']))
+
+def test_replay_orders_actions_like_recorded_costs(dataset):
+    env = ReplayIndexEnv(dataset)
+    env.reset(seed=0)
+    rewards = {action: np.mean([env.step(action)[1] for _ in range(20)]) for action in range(3)}
+    assert rewards[0] > rewards[1] > rewards[2]
+
+def test_replay_rejects_unrecorded_action(dataset):
+    env = ReplayIndexEnv(dataset)
+    env.reset(seed=0)
+    with pytest.raises(ValueError):
+        env.step(5)
+
+def test_replay_requires_transitions(tmp_path):
+    path = tmp_path / "empty.jsonl"
+    path.write_text("")
+    with pytest.raises(ValueError):
+        ReplayIndexEnv(path)
+
+def test_replay_maps_sparse_recorded_actions_densely(tmp_path):
+    path = tmp_path / "sparse.jsonl"
+    env = TransitionRecorder(FakeIndexEnv(), path=path)
+    env.reset(seed=0)
+    for i in range(20):
+        env.step(0 if i % 2 else 3)
+        env.reset()
+    env.close()
+
+    replay = ReplayIndexEnv(path)
+    assert replay.action_space.n == 2
+    assert replay.actions == [0, 3]
+    replay.reset(seed=0)
+    # Every action the policy can sample must be servable.
+    for _ in range(20):
+        _, reward, _, _, info = replay.step(replay.action_space.sample())
+        assert info['index'] == f"idx_{info['recorded_action']}"
+    _, reward, _, _, info = replay.step(1)
+    assert info['recorded_action'] == 3
+    assert reward == pytest.approx(-np.mean(info['query_times']))
+
+class FakeWorkloadEnv(FakeIndexEnv):
+    """FakeIndexEnv whose reward also charges writes and storage, which grow with the index."""
+
+    def step(self, action):
+        state, reward, terminated, truncated, info = super().step(action)
+        info.update({'avg_write_time': 0.05 * action, 'index_bytes': 2 ** 20 * action})
+        return state, reward - 0.05 * action - 0.01 * action, terminated, truncated, info
+
+def test_replay_keeps_recorded_write_and_storage_costs(tmp_path):
+    path = tmp_path / "workload.jsonl"
+    env = TransitionRecorder(FakeWorkloadEnv(), path=path)
+    env.reset(seed=0)
+    for i in range(30):
+        env.step(i % 3)
+        env.reset()
+    env.close()
+
+    replay = ReplayIndexEnv(path)
+    replay.reset(seed=0)
+    _, reward, _, _, info = replay.step(2)
+    assert (info['avg_write_time'], info['index_bytes']) == pytest.approx((0.1, 2 ** 21))
+    assert reward == pytest.approx(-np.mean(info['query_times']) - 0.12)
+    # Writes outweigh the faster reads, so the replayed objective now prefers no index.
+    rewards = {action: np.mean([replay.step(action)[1] for _ in range(20)]) for action in range(3)}
+    assert rewards[0] > rewards[1] > rewards[2]
@@ -0,0 +1,130 @@
+import sqlite3
+import pytest
+import numpy as np
+from Scripts.sampling import (approximate_interval, approximate_query, build_sample_table,
+                              pack_bundle, stratum_sample_size, unpack_bundle)
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE housing_encrypted (MedInc_enc BLOB, MedInc REAL)')
+    conn.executemany('INSERT INTO housing_encrypted VALUES (?, ?)',
+                     [(f'ct{i}'.encode(), float(i)) for i in range(2000)])
+    yield conn
+    conn.close()
+
+def test_bernoulli_sample_respects_fraction(conn):
+    n_sampled = build_sample_table(conn, fraction=0.1, seed=0)
+    assert 150 < n_sampled < 250
+    rows = conn.execute('SELECT source_rowid, MedInc_enc, sample_u, stratum, stratum_population '
+                        'FROM housing_encrypted_sample').fetchall()
+    assert len(rows) == n_sampled
+    assert all(u < 0.1 and stratum == 0 and population is None for _, _, u, stratum, population in rows)
+    assert rows[0][1] == f'ct{rows[0][0] - 1}'.encode()
+
+def test_stratified_sample_records_populations(conn):
+    build_sample_table(conn, fraction=0.2, method='stratified', n_strata=4, seed=0)
+    strata = conn.execute('SELECT stratum, stratum_population, COUNT(*) FROM housing_encrypted_sample '
+                          'GROUP BY stratum').fetchall()
+    assert [s for s, _, _ in strata] == [0, 1, 2, 3]
+    assert all(population == 500 and count == 100 for _, population, count in strata)
+
+def test_stratified_sample_has_fixed_size_at_every_fraction(conn):
+    build_sample_table(conn, fraction=0.3, method='stratified', n_strata=3, seed=0)
+    for fraction in (0.3, 0.25, 0.1, 0.01, 0.0003, 1 / 667):
+        counts = conn.execute('SELECT stratum_population, COUNT(*) FROM housing_encrypted_sample '
+                              'WHERE sample_u < ? GROUP BY stratum', (fraction,)).fetchall()
+        assert all(count == stratum_sample_size(population, fraction) for population, count in counts)
+        assert sum(count for _, count in counts) == sum(stratum_sample_size(n, fraction) for n in (666, 667, 667))
+
+def test_sample_is_reproducible(conn):
+    build_sample_table(conn, fraction=0.1, seed=7)
+    first = conn.execute('SELECT source_rowid FROM housing_encrypted_sample').fetchall()
+    build_sample_table(conn, fraction=0.1, seed=7)
+    assert conn.execute('SELECT source_rowid FROM housing_encrypted_sample').fetchall() == first
+
+def test_sample_rejects_bad_arguments(conn):
+    with pytest.raises(ValueError):
+        build_sample_table(conn, fraction=0)
+    with pytest.raises(ValueError):
+        build_sample_table(conn, method='systematic')
+    with pytest.raises(ValueError):
+        build_sample_table(conn, source='missing_table')
+
+def test_approximate_query_rewrite():
+    sql, before, after = approximate_query(
+        "SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted WHERE HouseAge_enc > ?", 0.05)
+    assert sql == ("SELECT homomorphic_sum_approx(MedInc_enc, stratum, stratum_population, ?) "
+                   "FROM housing_encrypted_sample WHERE HouseAge_enc > ? AND sample_u < ?")
+    assert before == after == [0.05]
+
+def test_approximate_query_without_where():
+    sql, _, _ = approximate_query("SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted ORDER BY 1", 0.5)
+    assert sql.endswith("FROM housing_encrypted_sample WHERE sample_u < ? ORDER BY 1")
+
+class CountingAggregate:
+    def __init__(self):
+        self.rows = []
+
+    def step(self, value, stratum, stratum_population, fraction):
+        self.rows.append(fraction)
+
+    def finalize(self):
+        return len(self.rows)
+
+def test_approximate_query_runs_on_sample(conn):
+    build_sample_table(conn, fraction=0.2, seed=0)
+    conn.create_aggregate('homomorphic_sum_approx', 4, CountingAggregate)
+    sql, before, after = approximate_query(
+        "SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted WHERE MedInc >= ?", 0.1)
+    count = conn.execute(sql, before + [1000.0] + after).fetchone()[0]
+    expected = conn.execute('SELECT COUNT(*) FROM housing_encrypted_sample WHERE MedInc >= 1000 AND sample_u < 0.1').fetchone()[0]
+    assert count == expected > 0
+
+def test_bundle_round_trip():
+    strata = [{'stratum': 0, 'n': 3, 'population': None, 'fraction': 0.1, 'sum': b'abc', 'sum_sq': b'de'},
+              {'stratum': 1, 'n': 1, 'population': 10, 'fraction': 0.1, 'sum': b'', 'sum_sq': b'f'}]
+    unpacked = unpack_bundle(pack_bundle(strata))
+    assert [(s['sum'], s['sum_sq'], s['population']) for s in unpacked] == [(b'abc', b'de', None), (b'', b'f', 10)]
+    with pytest.raises(ValueError):
+        unpack_bundle(b'nope')
+
+def _simulate_intervals(stratified, threshold=None, n_trials=200):
+    rng = np.random.default_rng(0)
+    # Values trend with rowid, as they would in a table loaded in some sorted order.
+    values = rng.lognormal(1.0, 0.5, size=20000) + np.linspace(0.0, 20.0, 20000)
+    strata_ids = np.arange(len(values)) * 4 // len(values)
+    matches = values > threshold if threshold is not None else np.ones(len(values), dtype=bool)
+    fraction, covered, widths = 0.05, 0, []
+    for _ in range(n_trials):
+        if stratified:
+            sampled = np.zeros(len(values), dtype=bool)
+            for h in range(4):
+                members = np.flatnonzero(strata_ids == h)
+                sampled[rng.choice(members, stratum_sample_size(len(members), fraction), replace=False)] = True
+        else:
+            sampled = rng.random(len(values)) < fraction
+        # As in SQL, the aggregate only sees sampled rows that pass the filter.
+        sampled &= matches
+        strata = []
+        for h in range(4 if stratified else 1):
+            mask = sampled & (strata_ids == h) if stratified else sampled
+            strata.append({'n': int(mask.sum()), 'fraction': fraction,
+                           'population': int((strata_ids == h).sum()) if stratified else None,
+                           'sum': values[mask].sum(), 'sum_sq': (values[mask] ** 2).sum()})
+        estimate, low, high = approximate_interval(strata, confidence=0.95)
+        assert low <= estimate <= high
+        covered += low <= values[matches].sum() <= high
+        widths.append(high - low)
+    return covered, np.mean(widths)
+
+@pytest.mark.parametrize('stratified', [False, True])
+def test_interval_covers_true_sum(stratified):
+    assert _simulate_intervals(stratified)[0] >= 180
+
+@pytest.mark.parametrize('stratified', [False, True])
+def test_interval_covers_true_sum_of_filtered_query(stratified):
+    assert _simulate_intervals(stratified, threshold=12.0)[0] >= 180
+
+def test_stratified_interval_is_narrower():
+    assert _simulate_intervals(True)[1] < 0.5 * _simulate_intervals(False)[1]
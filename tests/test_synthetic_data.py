@@ -0,0 +1,42 @@
+import numpy as np
+from Scripts.synthetic_data import (CORRELATION, FEATURES, MARGINALS, CaliforniaHousingGenerator,
+                                    load_california_housing)
+
+def test_generation_is_deterministic_across_chunk_sizes():
+    chunked = np.vstack(list(CaliforniaHousingGenerator(seed=7).iter_chunks(1000, chunk_size=64)))
+    whole = CaliforniaHousingGenerator(seed=7).generate(1000)
+    assert chunked.shape == (1000, len(FEATURES))
+    assert np.array_equal(chunked, whole)
+    assert not np.array_equal(whole, CaliforniaHousingGenerator(seed=8).generate(1000))
+
+def test_generated_rows_match_bounds_and_correlations():
+    rows = CaliforniaHousingGenerator(seed=0).generate(50000)
+    for column, name in enumerate(FEATURES):
+        _, _, _, low, high, integer = MARGINALS[name]
+        assert rows[:, column].min() >= low and rows[:, column].max() <= high
+        if integer:
+            assert np.array_equal(rows[:, column], np.round(rows[:, column]))
+    correlation = np.corrcoef(rows.T)
+    for a, b in [('MedInc', 'MedHouseVal'), ('AveRooms', 'AveBedrms'), ('Latitude', 'Longitude')]:
+        i, j = FEATURES.index(a), FEATURES.index(b)
+        assert abs(correlation[i, j] - CORRELATION[i, j]) < 0.06
+
+def test_load_sklearn_csv_scales_house_value(tmp_path):
+    path = tmp_path / 'housing.csv'
+    header = ['MedInc', 'HouseAge', 'AveRooms', 'AveBedrms', 'Population', 'AveOccup',
+              'Latitude', 'Longitude', 'MedHouseVal']
+    lines = [','.join(header)] + [f'8.3,41,6.9,1.0,{320 + i},2.5,37.88,-122.23,4.526' for i in range(5)]
+    path.write_text('\n'.join(lines) + '\n')
+    chunks = list(load_california_housing(path, chunk_size=2, n_rows=3))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    rows = np.vstack(chunks)
+    assert rows[0, FEATURES.index('MedHouseVal')] == 452600.0
+    assert rows[:, FEATURES.index('Population')].tolist() == [320, 321, 322]
+
+def test_load_statlib_data_derives_averages(tmp_path):
+    path = tmp_path / 'cal_housing.data'
+    path.write_text('-122.23,37.88,41,880,129,322,126,8.3252,452600\n')
+    (row,) = np.vstack(list(load_california_housing(path)))
+    assert row[FEATURES.index('AveRooms')] == 880 / 126
+    assert row[FEATURES.index('AveOccup')] == 322 / 126
+    assert row[FEATURES.index('MedHouseVal')] == 452600.0
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+from rl_agent.TelemetryWriter import TelemetryReader, TelemetryWriter
+
+def _record_steps(writer, n_steps, start=0):
+    for step in range(start, start + n_steps):
+        writer.record(episode=step // 10, step=step, reward=-0.1 * step, index='idx_housing_encrypted_medinc',
+                      query_times=[0.01, 0.02, 0.03], set_index_seconds=0.001)
+
+def test_buffer_flushes_when_full(tmp_path):
+    writer = TelemetryWriter(tmp_path, capacity=10, flush_interval=3600, file_format='csv')
+    _record_steps(writer, 25)
+    assert len(TelemetryReader(tmp_path).parts()) == 2
+    assert len(writer._buffer) == 5
+    writer.close()
+    assert len(TelemetryReader(tmp_path).parts()) == 3
+
+def test_background_flush(tmp_path):
+    writer = TelemetryWriter(tmp_path, capacity=1000, flush_interval=0.05, file_format='csv')
+    _record_steps(writer, 3)
+    writer._stop.wait(0.5)
+    assert TelemetryReader(tmp_path).parts()
+    writer.close()
+
+def test_reader_round_trip(tmp_path):
+    writer = TelemetryWriter(tmp_path, capacity=7, flush_interval=3600, file_format='csv')
+    _record_steps(writer, 20)
+    writer.close()
+    frame = TelemetryReader(tmp_path).load()
+    assert list(frame['step']) == list(range(20))
+    assert {'query_times_0', 'query_times_1', 'query_times_2', 'timestamp'} <= set(frame.columns)
+    chunks = list(TelemetryReader(tmp_path).iter_chunks(columns=['step', 'reward']))
+    assert len(chunks) == 3
+    assert list(chunks[0].columns) == ['step', 'reward']
+
+def test_reader_reads_only_requested_columns(tmp_path, monkeypatch):
+    writer = TelemetryWriter(tmp_path, flush_interval=3600, file_format='csv')
+    writer.record(step=0, reward=-1.0)
+    writer.flush()
+    writer.record(step=1, reward=-2.0, avg_write_time=0.5)
+    writer.close()
+
+    read_csv = pd.read_csv
+    calls = []
+    monkeypatch.setattr(pd, 'read_csv', lambda *args, **kwargs: calls.append(kwargs) or read_csv(*args, **kwargs))
+    chunks = list(TelemetryReader(tmp_path).iter_chunks(columns=['avg_write_time', 'step']))
+    assert [list(chunk.columns) for chunk in chunks] == [['avg_write_time', 'step']] * 2
+    assert chunks[0]['avg_write_time'].isna().all() and chunks[1]['avg_write_time'].tolist() == [0.5]
+    assert [call['usecols'] for call in calls if 'usecols' in call] == [['step'], ['avg_write_time', 'step']]
+
+def test_reopening_appends_new_parts(tmp_path):
+    writer = TelemetryWriter(tmp_path, flush_interval=3600, file_format='csv')
+    _record_steps(writer, 5)
+    writer.close()
+    writer = TelemetryWriter(tmp_path, flush_interval=3600, file_format='csv')
+    _record_steps(writer, 5, start=5)
+    writer.close()
+    assert list(TelemetryReader(tmp_path).load()['step']) == list(range(10))
+
+def test_parquet_format(tmp_path):
+    pytest.importorskip('pyarrow')
+    writer = TelemetryWriter(tmp_path, capacity=4, flush_interval=3600, file_format='parquet')
+    _record_steps(writer, 6)
+    writer.close()
+    assert len(TelemetryReader(tmp_path).load()) == 6
+
+def test_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        TelemetryWriter(tmp_path, file_format='json')
+
+def test_reopening_after_deleting_a_part_does_not_overwrite(tmp_path):
+    writer = TelemetryWriter(tmp_path, capacity=5, flush_interval=3600, file_format='csv')
+    _record_steps(writer, 15)
+    writer.close()
+    (tmp_path / 'part-000000.csv').unlink()
+    writer = TelemetryWriter(tmp_path, capacity=5, flush_interval=3600, file_format='csv')
+    _record_steps(writer, 5, start=15)
+    writer.close()
+    assert [p.name for p in TelemetryReader(tmp_path).parts()] == ['part-000001.csv', 'part-000002.csv', 'part-000003.csv']
+    assert list(TelemetryReader(tmp_path).load()['step']) == list(range(5, 20))
@@ -0,0 +1,44 @@
+import pytest
+import numpy as np
+from Pyfhel import Pyfhel, PyCtxt
+from Scripts.homomorphic_sum import EncodedPlaintextCache, homomorphic_weighted_sum_py, benchmark_weighted_sum
+
+@pytest.fixture(scope='module')
+def he():
+    """Fixture to initialize Pyfhel for use in tests."""
+    he_instance = Pyfhel()
+    qi_sizes = [60, 30, 30, 30, 30, 30, 60]
+    he_instance.contextGen(scheme='CKKS', n=2**14, scale=2**30, qi_sizes=qi_sizes)
+    he_instance.keyGen()
+    return he_instance
+
+def _encrypt(he, value):
+    return he.encryptPtxt(he.encodeFrac(np.array([value], dtype=np.float64))).to_bytes()
+
+def _decrypt(he, ciphertext_bytes):
+    return he.decryptFrac(PyCtxt(pyfhel=he, bytestring=ciphertext_bytes))[0]
+
+def test_weighted_sum_matches_dot_product(he):
+    values = [1.0, 2.0, 3.0, 4.0]
+    weights = [0.5, 2.0, 0.5, 1.5]
+    result = homomorphic_weighted_sum_py(he, [_encrypt(he, v) for v in values], weights)
+    np.testing.assert_almost_equal(_decrypt(he, result), np.dot(values, weights), decimal=1)
+
+def test_weighted_sum_skips_zero_weights(he):
+    result = homomorphic_weighted_sum_py(he, [_encrypt(he, 3.0), _encrypt(he, 5.0)], [0, 2.0])
+    np.testing.assert_almost_equal(_decrypt(he, result), 10.0, decimal=1)
+    assert homomorphic_weighted_sum_py(he, [_encrypt(he, 3.0)], [0]) is None
+
+def test_plaintext_cache_reuses_and_evicts(he):
+    cache = EncodedPlaintextCache(he, maxsize=2)
+    first = cache.get(1.5)
+    assert cache.get(1.5) is first
+    cache.get(2.5)
+    cache.get(3.5)
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert cache.get(1.5) is not first
+
+def test_benchmark_weighted_sum(he):
+    results = benchmark_weighted_sum(he, n_rows=20, n_distinct_weights=2)
+    assert results['cache_hit_rate'] >= 0.9
+    assert results['cached_error'] < 0.1
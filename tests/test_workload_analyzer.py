@@ -0,0 +1,90 @@
+import json
+import pytest
+from rl_agent.WorkloadAnalyzer import IndexCandidate, WorkloadAnalyzer, parse_query
+
+QUERIES = [
+    ("SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted WHERE HouseAge_enc > ?", [(10, 50)]),
+    ("SELECT homomorphic_sum(AveOccup_enc) FROM housing_encrypted WHERE Longitude_enc > ? AND Latitude_enc < ?", [(-120, -115), (32, 40)]),
+    ("SELECT homomorphic_sum(AveRooms_enc) FROM housing_encrypted WHERE MedInc_enc BETWEEN ? AND ?", [(2, 3), (8, 9)]),
+    ("SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted WHERE Population_enc > ? AND Longitude_enc < ?", [(1000, 5000), (-120, -115)]),
+]
+
+def test_parse_query_extracts_table_and_predicates():
+    table, predicates = parse_query("SELECT homomorphic_sum(x) FROM blocks WHERE region = ? AND MedInc_enc BETWEEN ? AND ? ORDER BY 1")
+    assert table == 'blocks'
+    assert predicates == [('region', True), ('MedInc_enc', False)]
+
+def test_parse_query_treats_negated_predicates_as_non_seek():
+    _, predicates = parse_query("SELECT homomorphic_sum(x) FROM blocks WHERE region NOT IN (?, ?) "
+                                "AND county IS NOT NULL AND tract IS NULL AND zone NOT LIKE ? AND state IN (?)")
+    assert predicates == [('region', False), ('county', False), ('tract', True), ('zone', False), ('state', True)]
+
+def test_parse_query_without_where():
+    assert parse_query("SELECT homomorphic_sum(MedInc_enc) FROM housing_encrypted") == ('housing_encrypted', [])
+
+def test_parse_query_requires_from():
+    with pytest.raises(ValueError):
+        parse_query("SELECT 1")
+
+def test_candidate_sql():
+    candidate = IndexCandidate('housing_encrypted', ('Longitude_enc', 'Latitude_enc'))
+    assert candidate.name == 'idx_housing_encrypted_longitude_latitude'
+    assert candidate.create_sql == ('CREATE INDEX IF NOT EXISTS idx_housing_encrypted_longitude_latitude '
+                                    'ON housing_encrypted (Longitude_enc, Latitude_enc)')
+    assert candidate.drop_sql == 'DROP INDEX IF EXISTS idx_housing_encrypted_longitude_latitude'
+
+def test_enumeration_puts_equality_columns_first():
+    analyzer = WorkloadAnalyzer([("SELECT homomorphic_sum(x) FROM t WHERE a > ? AND b = ?", [(0, 1), (0, 1)])])
+    keys = {c.columns for c in analyzer.enumerate_candidates()}
+    assert keys == {('a',), ('b',), ('b', 'a')}
+
+def test_shared_column_outranks_single_use_column():
+    analyzer = WorkloadAnalyzer(QUERIES)
+    benefit = {c.columns: c.benefit for c in analyzer.candidates()}
+    assert benefit[('Longitude_enc',)] > benefit[('Latitude_enc',)]
+
+def test_candidates_are_pruned_and_bounded():
+    candidates = WorkloadAnalyzer(QUERIES, max_candidates=3).candidates()
+    assert len(candidates) == 3
+    assert all(c.benefit > 0 for c in candidates)
+    assert [c.benefit for c in candidates] == sorted((c.benefit for c in candidates), reverse=True)
+
+def test_candidates_cover_multiple_tables():
+    queries = QUERIES + [("SELECT homomorphic_sum(v) FROM sales WHERE store_id = ?", [(1, 10)])]
+    tables = {c.table for c in WorkloadAnalyzer(queries, max_candidates=20).candidates()}
+    assert tables == {'housing_encrypted', 'sales'}
+
+def test_from_file_applies_weights(tmp_path):
+    path = tmp_path / "workload.json"
+    path.write_text(json.dumps([
+        {"query": QUERIES[0][0], "param_ranges": QUERIES[0][1], "weight": 10},
+        {"query": QUERIES[2][0], "param_ranges": QUERIES[2][1]},
+    ]))
+    candidates = WorkloadAnalyzer.from_file(path).candidates()
+    assert candidates[0].columns == ('HouseAge_enc',)
+
+ENV_QUERIES = QUERIES + [
+    ("SELECT homomorphic_sum(Population_enc) FROM housing_encrypted WHERE AveRooms_enc > ?", [(1, 10)]),
+    ("SELECT homomorphic_sum(MedHouseVal_enc) FROM housing_encrypted WHERE AveRooms_enc > ? AND AveBedrms_enc < ?", [(3, 6), (1, 3)]),
+]
+
+def test_range_only_composites_keep_one_ordering():
+    candidates = WorkloadAnalyzer(ENV_QUERIES, max_candidates=20).candidates()
+    column_sets = [frozenset(c.columns) for c in candidates if len(c.columns) > 1]
+    assert len(column_sets) == len(set(column_sets))
+    names = {c.name for c in candidates}
+    assert 'idx_housing_encrypted_averooms_avebedrms' in names
+    assert 'idx_housing_encrypted_avebedrms_averooms' not in names
+
+def test_equality_composites_keep_their_ordering():
+    analyzer = WorkloadAnalyzer([("SELECT homomorphic_sum(x) FROM t WHERE a = ? AND b = ?", [(0, 1), (0, 1)])])
+    keys = {c.columns for c in analyzer.candidates()}
+    assert {('a', 'b'), ('b', 'a')} <= keys
+
+@pytest.mark.parametrize('max_candidates', [6, 8])
+def test_every_query_keeps_a_candidate(max_candidates):
+    candidates = WorkloadAnalyzer(ENV_QUERIES, max_candidates=max_candidates).candidates()
+    assert len(candidates) == max_candidates
+    for query, _ in ENV_QUERIES:
+        _, predicates = parse_query(query)
+        assert any(c.columns[0] in dict(predicates) for c in candidates), query
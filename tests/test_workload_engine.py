@@ -0,0 +1,105 @@
+import sqlite3
+import struct
+import pytest
+from Scripts.housing_schema import COLUMNS, INSERT_SQL, insert_sql
+from rl_agent.WorkloadEngine import WorkloadEngine
+
+class FakeHE:
+    """Stands in for the HE handler: 'ciphertexts' are packed doubles."""
+
+    def __init__(self):
+        self.encrypted = 0
+
+    def encrypt_value(self, value):
+        self.encrypted += 1
+        return struct.pack('<d', value)
+
+QUERIES = [
+    ('SELECT COUNT(*) FROM housing_encrypted WHERE rowid > ?;', [(0, 1)]),
+    ('SELECT COUNT(*) FROM housing_encrypted;', []),
+]
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute(f"CREATE TABLE housing_encrypted ({', '.join(f'{column} BLOB' for column in COLUMNS)})")
+    conn.executemany(INSERT_SQL, [tuple(struct.pack('<d', float(i)) for _ in COLUMNS) for i in range(20)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+def _execute_query(conn):
+    calls = []
+
+    def execute_query(query, param_ranges):
+        params = [low for low, _ in param_ranges]
+        conn.execute(query, params).fetchall()
+        calls.append(query)
+        return 0.001, params
+    return execute_query, calls
+
+def test_schedule_follows_ratios():
+    engine = WorkloadEngine(FakeHE(), read_ratio=0.5, insert_ratio=0.5, update_ratio=0.0,
+                            arrival_rate=2000, seed=0)
+    ops = engine.schedule()
+    assert 1800 < len(ops) < 2200
+    assert 'update' not in ops
+    assert 0.45 < ops.count('read') / len(ops) < 0.55
+    assert WorkloadEngine(FakeHE(), seed=3).schedule() == WorkloadEngine(FakeHE(), seed=3).schedule()
+
+def test_invalid_ratios_are_rejected():
+    with pytest.raises(ValueError):
+        WorkloadEngine(FakeHE(), read_ratio=0, insert_ratio=0, update_ratio=0)
+    with pytest.raises(ValueError):
+        WorkloadEngine(FakeHE(), arrival_rate=0)
+
+def test_run_inserts_encrypted_rows_and_times_writes(conn):
+    he = FakeHE()
+    engine = WorkloadEngine(he, read_ratio=0.0, insert_ratio=1.0, update_ratio=0.0, arrival_rate=10,
+                            row_factory=lambda: tuple(range(len(COLUMNS))), seed=1)
+    execute_query, calls = _execute_query(conn)
+    result = engine.run(conn, QUERIES, execute_query)
+
+    n_rows = conn.execute('SELECT COUNT(*) FROM housing_encrypted').fetchone()[0]
+    assert n_rows == 20 + result['n_inserts']
+    assert len(result['write_times']) == result['n_inserts'] > 0
+    assert he.encrypted == result['n_inserts'] * len(COLUMNS)
+    last = conn.execute(f'SELECT {COLUMNS[-1]} FROM housing_encrypted ORDER BY rowid DESC LIMIT 1').fetchone()[0]
+    assert struct.unpack('<d', last)[0] == len(COLUMNS) - 1
+    # Templates without a scheduled read are still measured once.
+    assert calls == [query for query, _ in QUERIES]
+    assert result['query_params'] == [[0], []]
+
+def test_run_updates_existing_rows(conn):
+    engine = WorkloadEngine(FakeHE(), read_ratio=0.0, insert_ratio=0.0, update_ratio=1.0, arrival_rate=30,
+                            row_factory=lambda: tuple(-1.0 for _ in COLUMNS), seed=2)
+    execute_query, _ = _execute_query(conn)
+    result = engine.run(conn, QUERIES, execute_query)
+
+    assert result['n_updates'] == len(result['write_times']) > 0
+    values = [struct.unpack('<d', value)[0] for row in conn.execute('SELECT * FROM housing_encrypted') for value in row]
+    assert values.count(-1.0) > 0
+    assert conn.execute('SELECT COUNT(*) FROM housing_encrypted').fetchone()[0] == 20
+
+def test_run_writes_to_configured_table(conn):
+    conn.execute(f"CREATE TABLE housing_staging ({', '.join(f'{column} BLOB' for column in COLUMNS)})")
+    conn.executemany(insert_sql('housing_staging'), [tuple(struct.pack('<d', 0.0) for _ in COLUMNS)] * 5)
+    engine = WorkloadEngine(FakeHE(), read_ratio=0.0, insert_ratio=0.5, update_ratio=0.5, arrival_rate=30,
+                            row_factory=lambda: tuple(-1.0 for _ in COLUMNS), table='housing_staging', seed=3)
+    execute_query, _ = _execute_query(conn)
+    result = engine.run(conn, QUERIES, execute_query)
+
+    assert result['n_inserts'] > 0 and result['n_updates'] > 0
+    assert conn.execute('SELECT COUNT(*) FROM housing_staging').fetchone()[0] == 5 + result['n_inserts']
+    assert conn.execute('SELECT COUNT(*) FROM housing_encrypted').fetchone()[0] == 20
+
+def test_index_storage_bytes(conn):
+    engine = WorkloadEngine(FakeHE())
+    conn.execute(f'CREATE INDEX idx_medinc ON housing_encrypted ({COLUMNS[0]})')
+    assert engine.index_storage_bytes(conn, ['idx_medinc']) > 0
+    assert engine.index_storage_bytes(conn, ['idx_missing']) == 0
+    assert engine.index_storage_bytes(conn, [None]) == 0
+
+def test_reward_charges_writes_and_storage():
+    engine = WorkloadEngine(FakeHE(), write_weight=2.0, storage_weight=0.5)
+    assert engine.reward(0.1, 0.05, 2 ** 20) == pytest.approx(-(0.1 + 0.1 + 0.5))